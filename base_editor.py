@@ -2,15 +2,108 @@
 # -*- coding: utf-8 -*-
 
 
+import locale
+import mmap
+import os
 import pathlib
 import sys
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
 
+def write_text_file(file_path: str, text_chunks: Iterable[str]) -> None:
+    """
+    Write text to a file, the file is replaced only if all the text was written
+
+    :param file_path: path to write the text into
+    :type file_path: str
+    :param text_chunks: text to write, in chunks
+    :type text_chunks: Iterable[str]
+    :return: None
+    :rtype: None
+    :raises OSError: if the file couldn't be written
+    """
+    save_file: QSaveFile = QSaveFile(file_path)
+
+    if not save_file.open(QIODevice.WriteOnly | QIODevice.Text):
+        raise OSError(save_file.errorString())
+
+    text_stream: QTextStream = QTextStream(save_file)
+    for text_chunk in text_chunks:
+        text_stream << text_chunk
+    text_stream.flush()
+
+    # keep the old file if writing failed, otherwise replace it with the written one
+    if text_stream.status() != QTextStream.Ok:
+        save_file.cancelWriting()
+
+    if not save_file.commit():
+        raise OSError(save_file.errorString())
+
+
+class AutoSaveSignals(QObject):
+    """
+    Signals of an auto save task, emitted from the thread pool & received in the editor's thread
+
+    pyqtSignals:
+        - Finished(file_path: str, revision: int, error: str): the text was written (error is empty),
+          or writing it failed
+    """
+
+    Finished: pyqtSignal = pyqtSignal(str, int, str)
+
+
+class AutoSaveTask(QRunnable):
+    """
+    Write a snapshot of an editor's text to its file, in a thread pool.
+    The snapshot is written while holding the editor's save mutex, and not at all if the task was cancelled
+    by a newer save before it got the mutex
+    """
+
+    def __init__(self, file_path: str, text: str, revision: int, save_mutex: QMutex):
+        """
+        Initialize auto save task
+
+        :param file_path: path to write the text into
+        :type file_path: str
+        :param text: snapshot of the editor's text
+        :type text: str
+        :param revision: document revision the snapshot was taken at
+        :type revision: int
+        :param save_mutex: editor's save mutex, held while the editor's file is written
+        :type save_mutex: QMutex
+        """
+        super(AutoSaveTask, self).__init__()
+        self.file_path: str = file_path
+        self.text: str = text
+        self.revision: int = revision
+        self.save_mutex: QMutex = save_mutex
+        self.cancelled: bool = False  # set while holding the save mutex
+        self.signals: AutoSaveSignals = AutoSaveSignals()
+
+    def run(self) -> None:
+        """
+        Write the text, then report the result
+
+        :return: None
+        :rtype: None
+        """
+        error: str = ""
+        self.save_mutex.lock()
+        try:
+            if not self.cancelled:
+                write_text_file(self.file_path, (self.text,))
+        except Exception as exc:
+            error = str(exc)
+        finally:
+            self.save_mutex.unlock()
+
+        self.signals.Finished.emit(self.file_path, self.revision, error)
+
+
 class BaseCodeEditor(QPlainTextEdit):
     """
     Basic code editor
@@ -23,8 +116,27 @@ class BaseCodeEditor(QPlainTextEdit):
         - duplicate current line/selection down
         - zoom in
         - zoom out
+        - word wrap toggle
+
+    pyqtSignals:
+        - AutoSaveFailed(message: str): auto saving the open file failed
     """
 
+    AutoSaveFailed: pyqtSignal = pyqtSignal(str)
+
+    # action shortcuts, shared by all editors
+    REMOVE_LINES_SHORTCUT: QKeySequence = QKeySequence(Qt.Key_D | Qt.CTRL)
+    DUPLICATE_LINES_DOWN_SHORTCUT: QKeySequence = QKeySequence(Qt.CTRL | Qt.ALT | Qt.Key_Down)
+    DUPLICATE_LINES_UP_SHORTCUT: QKeySequence = QKeySequence(Qt.CTRL | Qt.ALT | Qt.Key_Up)
+    MOVE_LINES_UP_SHORTCUT: QKeySequence = QKeySequence(Qt.ALT | Qt.Key_Up)
+    MOVE_LINES_DOWN_SHORTCUT: QKeySequence = QKeySequence(Qt.ALT | Qt.Key_Down)
+    ZOOM_IN_SHORTCUT: QKeySequence = QKeySequence(Qt.Key_Plus | Qt.CTRL)
+    ZOOM_OUT_SHORTCUT: QKeySequence = QKeySequence(Qt.Key_Minus | Qt.CTRL)
+    WORD_WRAP_TOGGLE_SHORTCUT: QKeySequence = QKeySequence(Qt.ALT | Qt.Key_Z)
+
+    # editor font shared by all editors, created with the first editor (fonts need a QGuiApplication)
+    _SHARED_FONT: Optional[QFont] = None
+
     def __init__(self, *args, **kwargs):
         """
         Initialize mindustry logic editor instance
@@ -39,60 +151,130 @@ class BaseCodeEditor(QPlainTextEdit):
         # current open file path
         self.path: Optional[pathlib.Path] = None
 
+        # auto save being written in the thread pool, another one isn't queued till it's done.
+        # saves hold the save mutex while writing, a save cancels the auto save if it wasn't written yet
+        self._auto_save_task: Optional[AutoSaveTask] = None
+        self._save_mutex: QMutex = QMutex()
+
+        # plain text snapshot of the document, built lazily on read and dropped whenever the document changes
+        self._plain_text_cache: Optional[str] = None
+        self.document().contentsChange.connect(self._invalidate_text_cache)
+
         # ----------------------------------------------------------------------
         # ---------------------- configure GUI components ----------------------
         # ----------------------------------------------------------------------
 
-        # set editor font
-        self.font: QFont = QFont("Consolas", 14, QFont.Normal)
+        # set editor font, each editor zooms its own copy of the shared font
+        if BaseCodeEditor._SHARED_FONT is None:
+            BaseCodeEditor._SHARED_FONT = QFont("Consolas", 14, QFont.Normal)
+        self.font: QFont = QFont(BaseCodeEditor._SHARED_FONT)
         self.setFont(self.font)
 
+        # zoom steps requested since the font was last resized, applied once per event loop pass
+        self._zoom_pending: int = 0
+        self._zoom_timer: QTimer = QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.timeout.connect(self._apply_zoom)
+
+        # don't wrap lines, long code lines would be re-wrapped on every edit & resize
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+
         # set tab to 4 spaces
         self.tab_width: int = 4
         self.setTabStopWidth(self.fontMetrics().horizontalAdvance(" ") * self.tab_width)
 
         # remove current line action
         self.remove_lines_action: QAction = QAction(self)
-        self.remove_lines_action.setShortcut(QKeySequence(Qt.Key_D | Qt.CTRL))
+        self.remove_lines_action.setShortcut(BaseCodeEditor.REMOVE_LINES_SHORTCUT)
         self.remove_lines_action.triggered.connect(self.remove_lines)
         self.addAction(self.remove_lines_action)
 
         # duplicate lines action down
         self.duplicate_lines_down_action: QAction = QAction(self)
-        self.duplicate_lines_down_action.setShortcut(QKeySequence(Qt.CTRL | Qt.ALT | Qt.Key_Down))
+        self.duplicate_lines_down_action.setShortcut(BaseCodeEditor.DUPLICATE_LINES_DOWN_SHORTCUT)
         self.duplicate_lines_down_action.triggered.connect(self.duplicate_lines_down)
         self.addAction(self.duplicate_lines_down_action)
 
         # duplicate lines action up
         self.duplicate_lines_up_action: QAction = QAction(self)
-        self.duplicate_lines_up_action.setShortcut(QKeySequence(Qt.CTRL | Qt.ALT | Qt.Key_Up))
+        self.duplicate_lines_up_action.setShortcut(BaseCodeEditor.DUPLICATE_LINES_UP_SHORTCUT)
         self.duplicate_lines_up_action.triggered.connect(self.duplicate_lines_up)
         self.addAction(self.duplicate_lines_up_action)
 
         # move line up action
         self.move_lines_up_action: QAction = QAction(self)
-        self.move_lines_up_action.setShortcut(QKeySequence(Qt.ALT | Qt.Key_Up))
+        self.move_lines_up_action.setShortcut(BaseCodeEditor.MOVE_LINES_UP_SHORTCUT)
         self.move_lines_up_action.triggered.connect(self.move_lines_up)
         self.addAction(self.move_lines_up_action)
 
         # move line down action
         self.move_lines_down_action: QAction = QAction(self)
-        self.move_lines_down_action.setShortcut(QKeySequence(Qt.ALT | Qt.Key_Down))
+        self.move_lines_down_action.setShortcut(BaseCodeEditor.MOVE_LINES_DOWN_SHORTCUT)
         self.move_lines_down_action.triggered.connect(self.move_lines_down)
         self.addAction(self.move_lines_down_action)
 
         # zoom in action
         self.zoom_in_action: QAction = QAction(self)
-        self.zoom_in_action.setShortcut(QKeySequence(Qt.Key_Plus | Qt.CTRL))
+        self.zoom_in_action.setShortcut(BaseCodeEditor.ZOOM_IN_SHORTCUT)
         self.zoom_in_action.triggered.connect(self.zoomIn)
         self.addAction(self.zoom_in_action)
 
         # zoom out action
         self.zoom_out_action: QAction = QAction(self)
-        self.zoom_out_action.setShortcut(QKeySequence(Qt.Key_Minus | Qt.CTRL))
+        self.zoom_out_action.setShortcut(BaseCodeEditor.ZOOM_OUT_SHORTCUT)
         self.zoom_out_action.triggered.connect(self.zoomOut)
         self.addAction(self.zoom_out_action)
 
+        # word wrap toggle action
+        self.word_wrap_toggle_action: QAction = QAction(self)
+        self.word_wrap_toggle_action.setShortcut(BaseCodeEditor.WORD_WRAP_TOGGLE_SHORTCUT)
+        self.word_wrap_toggle_action.triggered.connect(self.toggle_word_wrap)
+        self.addAction(self.word_wrap_toggle_action)
+
+    @pyqtSlot()
+    def toggle_word_wrap(self) -> None:
+        """
+        Toggle wrapping lines at editor's width
+
+        :return: None
+        :rtype: None
+        """
+        if self.lineWrapMode() == QPlainTextEdit.NoWrap:
+            self.setLineWrapMode(QPlainTextEdit.WidgetWidth)
+        else:
+            self.setLineWrapMode(QPlainTextEdit.NoWrap)
+
+    @pyqtSlot(int, int, int)
+    def _invalidate_text_cache(self, position: int, chars_removed: int, chars_added: int) -> None:
+        """
+        Drop the plain text snapshot after the document's contents change
+
+        :param position: position of the change
+        :type position: int
+        :param chars_removed: number of removed characters
+        :type chars_removed: int
+        :param chars_added: number of added characters
+        :type chars_added: int
+        :return: None
+        :rtype: None
+        """
+        self._plain_text_cache = None
+
+    def _ensure_text_cache(self) -> None:
+        """
+        Build the plain text snapshot, if it was invalidated.
+        Lines are separated by new lines, other characters are kept as they are in the document (unlike
+        toPlainText(), which replaces line separators & non-breaking spaces), so each character in the snapshot
+        is the document's character at the same position
+
+        :return: None
+        :rtype: None
+        """
+        if self._plain_text_cache is not None:
+            return
+
+        self._plain_text_cache = self.document().toRawText().replace("\u2029", "\n")
+
     def is_modified(self) -> True:
         """
         Return true if the editor's document was modified
@@ -131,33 +313,90 @@ class BaseCodeEditor(QPlainTextEdit):
         new_file, _ = QFileDialog.getOpenFileName(
             self,
             "Open File",
-            str(pathlib.Path.cwd()),
+            QDir.currentPath(),
             "Mindustry Logic (*.mlog);;Text Files (*.txt);;All Files (*.*)",
         )
 
         if new_file:
             try:
-                with open(new_file, "r") as file_handle:
-                    file_content = file_handle.read()
+                with open(new_file, "rb") as file_handle:
+                    # empty files can't be memory mapped
+                    if os.fstat(file_handle.fileno()).st_size == 0:
+                        file_content = ""
+                    else:
+                        # decode straight from the mapped file, without reading it into a bytes copy first
+                        with mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+                            file_content = str(file_map, locale.getpreferredencoding(False))
             except Exception as exc:
                 self.show_error(str(exc))
 
             else:
                 self.path = pathlib.Path(new_file)
-                self.setPlainText(file_content)
+                self.load_text(file_content)
 
-    def auto_save(self):
+    def load_text(self, file_content: str) -> None:
         """
-        Called by auto save timer to save current open file if it was modified
+        Replace editor's text with an opened file's content
 
+        :param file_content: file content
+        :type file_content: str
         :return: None
         :rtype: None
         """
+        # loading a file starts a new undo history, don't record the loaded text in it
+        self.setUndoRedoEnabled(False)
+        self.setPlainText(file_content)
+        self.setUndoRedoEnabled(True)
 
-        if self.path is None:
+    def auto_save(self) -> None:
+        """
+        Called by auto save timer to save current open file if it was modified.
+        The text is copied here, and written to the file in the global thread pool
+
+        :return: None
+        :rtype: None
+        """
+
+        if self.path is None or self._auto_save_task is not None or not self.is_modified():
             return
 
-        self.save_file()
+        document: QTextDocument = self.document()
+        auto_save_task: AutoSaveTask = AutoSaveTask(
+            str(self.path),
+            document.toPlainText(),  # same text as a save writes
+            document.revision(),
+            self._save_mutex,
+        )
+        auto_save_task.signals.Finished.connect(self._auto_save_finished)
+        self._auto_save_task = auto_save_task
+        QThreadPool.globalInstance().start(auto_save_task)
+
+    @pyqtSlot(str, int, str)
+    def _auto_save_finished(self, file_path: str, revision: int, error: str) -> None:
+        """
+        Auto save task finished, the document is unmodified if it wasn't changed since its text was copied.
+        Nothing was written if a save cancelled the task
+
+        :param file_path: path the text was written into
+        :type file_path: str
+        :param revision: document revision the text was copied at
+        :type revision: int
+        :param error: error message, empty if the text was written
+        :type error: str
+        :return: None
+        :rtype: None
+        """
+        auto_save_task: Optional[AutoSaveTask] = self._auto_save_task
+        self._auto_save_task = None
+
+        if auto_save_task is None or auto_save_task.cancelled:
+            return
+
+        if error:
+            self.AutoSaveFailed.emit(error)
+
+        elif file_path == str(self.path) and revision == self.document().revision():
+            self.document().setModified(False)
 
     def save_file(self) -> None:
         """
@@ -180,7 +419,7 @@ class BaseCodeEditor(QPlainTextEdit):
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Save File As",
-            str(pathlib.Path.cwd()),
+            QDir.currentPath(),
             "Mindustry Logic (*.mlog);;Text Files (*.txt);;All Files (*.*)",
         )
 
@@ -196,12 +435,17 @@ class BaseCodeEditor(QPlainTextEdit):
         :return: None
         :rtype: None
         """
-        current_text = self.toPlainText()
-
         try:
-            with open(file_path, "w") as file_handle:
-                file_handle.write(current_text)
+            # wait for an auto save being written, & cancel one that wasn't written yet (its text is older)
+            self._save_mutex.lock()
+            try:
+                if self._auto_save_task is not None:
+                    self._auto_save_task.cancelled = True
 
+                # write document's lines, without copying the whole text first
+                write_text_file(str(file_path), self._iter_lines_text())
+            finally:
+                self._save_mutex.unlock()
         except Exception as exc:
             self.show_error(str(exc))
 
@@ -209,6 +453,22 @@ class BaseCodeEditor(QPlainTextEdit):
             self.path = file_path
             self.document().setModified(False)
 
+    def _iter_lines_text(self) -> Iterator[str]:
+        """
+        Iterate over document's lines text, separated by new lines.
+        Line separators & non-breaking spaces are written as in toPlainText()
+
+        :return: lines text & new lines between them
+        :rtype: Iterator[str]
+        """
+        text_block: QTextBlock = self.document().firstBlock()
+        yield text_block.text().replace("\u2028", "\n").replace("\u00a0", " ")
+        text_block = text_block.next()
+        while text_block.isValid():
+            yield "\n"
+            yield text_block.text().replace("\u2028", "\n").replace("\u00a0", " ")
+            text_block = text_block.next()
+
     def keyPressEvent(self, event: QKeyEvent):
         """
         Handle key press events within editor
@@ -220,8 +480,7 @@ class BaseCodeEditor(QPlainTextEdit):
         :rtype: None
         """
 
-        event_modifiers = event.modifiers()
-        no_modifiers = event_modifiers == Qt.NoModifier
+        no_modifiers: bool = int(event.modifiers()) == 0
         event_key = event.key()
 
         # replace tabs ith spaces
@@ -548,9 +807,8 @@ class BaseCodeEditor(QPlainTextEdit):
         :return:
         :rtype:
         """
-        font_size = self.font.pointSize()
-        self.font.setPointSize(font_size + 1)
-        self.setFont(self.font)
+        self._zoom_pending += 1
+        self._zoom_timer.start(0)
 
     def zoomOut(self, range: int = ...) -> None:
         """
@@ -562,8 +820,23 @@ class BaseCodeEditor(QPlainTextEdit):
         :rtype:
         """
 
+        self._zoom_pending -= 1
+        self._zoom_timer.start(0)
+
+    @pyqtSlot()
+    def _apply_zoom(self) -> None:
+        """
+        Resize editor font by all zoom steps requested since the last resize
+
+        :return: None
+        :rtype: None
+        """
+        if self._zoom_pending == 0:
+            return
+
         font_size = self.font.pointSize()
-        self.font.setPointSize(font_size - 1)
+        self.font.setPointSize(max(1, font_size + self._zoom_pending))
+        self._zoom_pending = 0
         self.setFont(self.font)
 
     @staticmethod
@@ -579,23 +852,19 @@ class BaseCodeEditor(QPlainTextEdit):
         """
         selection_start: int = text_cursor.selectionStart()
         selection_end: int = text_cursor.selectionEnd()
+        document: QTextDocument = text_cursor.document()
 
-        if selection_start == selection_end:
-            text_cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.MoveAnchor)
-            text_cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
-
-        else:
-            # move to the start of the first selected line
-            text_cursor.setPosition(selection_start, QTextCursor.MoveAnchor)
-            text_cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.MoveAnchor)
-
-            # move to the end of the last selected line
-            text_cursor.setPosition(selection_end, QTextCursor.KeepAnchor)
+        # first & last selected lines
+        start_block: QTextBlock = document.findBlock(selection_start)
+        end_block: QTextBlock = document.findBlock(selection_end)
 
-            if text_cursor.positionInBlock() == 0:
-                text_cursor.movePosition(QTextCursor.PreviousBlock, QTextCursor.KeepAnchor)
+        # selection ends at the start of a line, that line isn't selected
+        if selection_end > selection_start and selection_end == end_block.position():
+            end_block = end_block.previous()
 
-            text_cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        # select from the start of the first selected line to the end of the last selected line
+        text_cursor.setPosition(start_block.position(), QTextCursor.MoveAnchor)
+        text_cursor.setPosition(end_block.position() + end_block.length() - 1, QTextCursor.KeepAnchor)
 
         return text_cursor.selectionEnd() - text_cursor.selectionStart()
 
@@ -610,9 +879,15 @@ class BaseCodeEditor(QPlainTextEdit):
         :rtype: None
         """
 
-        selection_text: str = text_cursor.selectedText()
+        selection: QTextDocumentFragment = text_cursor.selection()
+        selection_end: int = text_cursor.selectionEnd()
 
-        text_cursor.insertText(f"{selection_text}\u2029{selection_text}")
+        # insert a new line & a copy of the selection after the selection
+        text_cursor.beginEditBlock()
+        text_cursor.setPosition(selection_end, QTextCursor.MoveAnchor)
+        text_cursor.insertBlock()
+        text_cursor.insertFragment(selection)
+        text_cursor.endEditBlock()
 
 
 if __name__ == "__main__":
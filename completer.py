@@ -2,33 +2,157 @@
 # -*- coding: utf-8 -*-
 
 
-from typing import List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 from PyQt5.QtCore import *
 from PyQt5.QtWidgets import *
 
 
+class KeywordTrie(object):
+    """Prefix tree of keywords, finds all keywords that start with a prefix without scanning all keywords"""
+
+    __slots__ = ["root"]
+
+    # node key that marks the end of a keyword, keeps the keyword as its value
+    WORD_END: str = ""
+
+    def __init__(self, word_list: Iterable[str] = ()):
+        """
+        Initialize keyword trie
+
+        :param word_list: keywords
+        :type word_list: Iterable[str]
+        """
+        self.root: Dict[str, Any] = dict()
+        for word in word_list:
+            self.insert(word)
+
+    def insert(self, word: str) -> None:
+        """
+        Insert a keyword into the trie
+
+        :param word: keyword
+        :type word: str
+        :return: None
+        :rtype: None
+        """
+        node: Dict[str, Any] = self.root
+        for char in word:
+            node = node.setdefault(char, dict())
+        node[KeywordTrie.WORD_END] = word
+
+    def words_with_prefix(self, prefix: str) -> List[str]:
+        """
+        Get all keywords that start with a prefix
+
+        :param prefix: keyword prefix
+        :type prefix: str
+        :return: sorted list of keywords starting with prefix
+        :rtype: List[str]
+        """
+        node: Optional[Dict[str, Any]] = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return list()
+
+        words: List[str] = list()
+        nodes: List[Dict[str, Any]] = [node]
+        while nodes:
+            for key, value in nodes.pop().items():
+                if key == KeywordTrie.WORD_END:
+                    words.append(value)
+                else:
+                    nodes.append(value)
+
+        words.sort()
+        return words
+
+
+class KeywordListModel(QAbstractListModel):
+    """List model of the keywords that start with the current completion prefix"""
+
+    def __init__(self, word_list: Iterable[str], *args, **kwargs):
+        super(KeywordListModel, self).__init__(*args, **kwargs)
+        self.trie: KeywordTrie = KeywordTrie(word_list)
+        self.prefix: str = ""
+        self.words: List[str] = self.trie.words_with_prefix(self.prefix)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.words)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Optional[str]:
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.words[index.row()]
+
+    def set_prefix(self, prefix: str) -> None:
+        """
+        Show only keywords that start with a prefix
+
+        :param prefix: completion prefix
+        :type prefix: str
+        :return: None
+        :rtype: None
+        """
+        if prefix == self.prefix:
+            return
+
+        self.beginResetModel()
+        self.prefix = prefix
+        self.words = self.trie.words_with_prefix(prefix)
+        self.endResetModel()
+
+    def set_words(self, word_list: Iterable[str]) -> None:
+        """
+        Replace model keywords
+
+        :param word_list: new keywords
+        :type word_list: Iterable[str]
+        :return: None
+        :rtype: None
+        """
+        self.beginResetModel()
+        self.trie = KeywordTrie(word_list)
+        self.words = self.trie.words_with_prefix(self.prefix)
+        self.endResetModel()
+
+
 class MindustryLogicCompleter(QCompleter):
 
-    def __init__(self, word_list: List[str], *args, **kwargs):
+    def __init__(self, word_list: Iterable[str], *args, **kwargs):
         super(MindustryLogicCompleter, self).__init__(*args, **kwargs)
-        self.model: QStringListModel = QStringListModel(word_list)
+        self.model: KeywordListModel = KeywordListModel(word_list)
         self.setModel(self.model)
+        self.setModelSorting(QCompleter.CaseSensitivelySortedModel)
 
-    def update_model(self, word_list: List[str]) -> None:
+    def setCompletionPrefix(self, prefix: str) -> None:
+        """
+        Set completion prefix, the model is narrowed down to keywords starting with the prefix
+        before the completer filters it
+
+        :param prefix: completion prefix
+        :type prefix: str
+        :return: None
+        :rtype: None
+        """
+        self.model.set_prefix(prefix)
+        super(MindustryLogicCompleter, self).setCompletionPrefix(prefix)
+
+    def update_model(self, word_list: Iterable[str]) -> None:
         """
         Update completer model
 
-        :param word_list: new list of words
-        :type word_list: List[str]
+        :param word_list: new list (or set) of words
+        :type word_list: Iterable[str]
         :return: None
         :rtype: None
         """
+        word_list: List[str] = list(word_list)
         if len(word_list) == 0:
             return
 
-        self.model.setStringList(word_list)
-        self.setModel(self.model)
+        self.model.set_words(word_list)
 
 
 if __name__ == '__main__':
@@ -2,7 +2,18 @@
 # -*- coding: utf-8 -*-
 
 
+import os
+from typing import Dict, Optional
+
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon
+
+
+# images directory, next to the editor's sources
+IMAGES_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+
+# icons loaded from images directory, keyed by file name
+_ICON_CACHE: Dict[str, QIcon] = dict()
 
 
 def test_modifiers(value: Qt.KeyboardModifiers, flag: Qt.KeyboardModifier):
@@ -16,7 +27,24 @@ def test_modifiers(value: Qt.KeyboardModifiers, flag: Qt.KeyboardModifier):
     :return: True if modifier is in value, False otherwise
     :rtype: bool
     """
-    return (value & flag) == flag
+    flag = int(flag)
+    return (int(value) & flag) == flag
+
+
+def load_icon(name: str) -> QIcon:
+    """
+    Get an icon from images directory, each icon file is loaded only once
+
+    :param name: icon file name
+    :type name: str
+    :return: icon
+    :rtype: QIcon
+    """
+    icon: Optional[QIcon] = _ICON_CACHE.get(name)
+    if icon is None:
+        icon = QIcon(os.path.join(IMAGES_DIR, name))
+        _ICON_CACHE[name] = icon
+    return icon
 
 
 if __name__ == '__main__':
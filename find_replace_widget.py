@@ -3,6 +3,7 @@
 
 
 import enum
+import functools
 import os
 import sys
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -11,6 +12,8 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
+from editor_utils import load_icon
+
 
 class SearchFlags(enum.IntFlag):
     """
@@ -22,12 +25,47 @@ class SearchFlags(enum.IntFlag):
         - WholeWord: match whole word only
         - Regex: treat search expression as a regular expression and return all occurrences that fulfill it
         - AllOccurrences: apply to all occurrences that match search expression
+        - Incremental: search while the search expression is typed, starting from the current match
     """
     NoFlags = 0
     CaseSensitive = enum.auto()
     WholeWord = enum.auto()
     Regex = enum.auto()
     AllOccurrences = enum.auto()
+    Incremental = enum.auto()
+
+
+# characters that have a special meaning in a regular expression
+REGEX_META_CHARACTERS: frozenset = frozenset("\\^$.|?*+()[]{}")
+
+
+@functools.lru_cache(maxsize=128)
+def compile_search_regex(search_expr: str, search_flags: SearchFlags) -> QRegExp:
+    """
+    Get regular expression for a search expression, regular expressions are cached by search expression and flags
+
+    :param search_expr: search expression
+    :type search_expr: str
+    :param search_flags: search flags
+    :type search_flags: SearchFlags
+    :return: regular expression
+    :rtype: QRegExp
+    """
+    if search_flags & SearchFlags.CaseSensitive:
+        return QRegExp(search_expr, Qt.CaseSensitive)
+    return QRegExp(search_expr)
+
+
+def is_literal_expression(search_expr: str) -> bool:
+    """
+    Test a regular expression has no special characters, so it matches only its own text
+
+    :param search_expr: search expression
+    :type search_expr: str
+    :return: True if the search expression has no special characters, False otherwise
+    :rtype: bool
+    """
+    return REGEX_META_CHARACTERS.isdisjoint(search_expr)
 
 
 class FindAndReplaceWidget(QWidget):
@@ -71,6 +109,9 @@ class FindAndReplaceWidget(QWidget):
 
             return widget_size
 
+    # push buttons style, shared by all find and replace widgets
+    _SHARED_STYLE: Optional[StyleProxy] = None
+
     def __init__(self, editor: QWidget, *args: Tuple[Any], **kwargs: Dict[str, Any]) -> None:
         """
         Initialize a find and replace widget
@@ -95,6 +136,10 @@ class FindAndReplaceWidget(QWidget):
         font.setPointSize(12)
         self.setFont(font)
 
+        # push buttons style
+        if FindAndReplaceWidget._SHARED_STYLE is None:
+            FindAndReplaceWidget._SHARED_STYLE = FindAndReplaceWidget.StyleProxy()
+
         # layout
         self.widget_layout: QGridLayout = QGridLayout(self)
         self.setLayout(self.widget_layout)
@@ -114,21 +159,26 @@ class FindAndReplaceWidget(QWidget):
         self.search_text.setSizePolicy(size_policy)
         self.search_text.setToolTip("Find What?")
 
+        # search while typing, once the search text stops changing
+        self.search_timer: QTimer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+
         # find next button
         self.find_next_button: QPushButton = QPushButton()
         self.find_next_button.setText("Find Next")
         self.find_next_button.setToolTip("Find Next")
-        self.find_next_button.setStyle(FindAndReplaceWidget.StyleProxy())
+        self.find_next_button.setStyle(FindAndReplaceWidget._SHARED_STYLE)
 
         # find prev button
         self.mark_all_button: QPushButton = QPushButton()
         self.mark_all_button.setText("Mark All")
         self.mark_all_button.setToolTip("MarK All")
-        self.mark_all_button.setStyle(FindAndReplaceWidget.StyleProxy())
+        self.mark_all_button.setStyle(FindAndReplaceWidget._SHARED_STYLE)
 
         # close/hide button
         self.close_button: QPushButton = QPushButton()
-        self.close_button.setIcon(QIcon(os.path.join("images", "close.png")))
+        self.close_button.setIcon(load_icon("close.png"))
         self.close_button.setFlat(True)
         self.close_button.setFlat(True)
         self.close_button.setToolTip("Close")
@@ -136,7 +186,7 @@ class FindAndReplaceWidget(QWidget):
 
         # case sensitive button
         self.case_sensitive_button: QPushButton = QPushButton()
-        self.case_sensitive_button.setIcon(QIcon(os.path.join("images", "match-case.png")))
+        self.case_sensitive_button.setIcon(load_icon("match-case.png"))
         self.case_sensitive_button.setFlat(True)
         self.case_sensitive_button.setCheckable(True)
         self.case_sensitive_button.setToolTip("Match Case")
@@ -144,7 +194,7 @@ class FindAndReplaceWidget(QWidget):
 
         # whole word button
         self.whole_word_button: QPushButton = QPushButton()
-        self.whole_word_button.setIcon(QIcon(os.path.join("images", "whole-word.png")))
+        self.whole_word_button.setIcon(load_icon("whole-word.png"))
         self.whole_word_button.setFlat(True)
         self.whole_word_button.setCheckable(True)
         self.whole_word_button.setToolTip("Match Whole Word")
@@ -152,7 +202,7 @@ class FindAndReplaceWidget(QWidget):
 
         # regex button
         self.regex_button: QPushButton = QPushButton()
-        self.regex_button.setIcon(QIcon(os.path.join("images", "regex.png")))
+        self.regex_button.setIcon(load_icon("regex.png"))
         self.regex_button.setFlat(True)
         self.regex_button.setCheckable(True)
         self.regex_button.setToolTip("Regular Expression")
@@ -177,13 +227,13 @@ class FindAndReplaceWidget(QWidget):
         self.replace_next_button: QPushButton = QPushButton()
         self.replace_next_button.setText("Replace")
         self.replace_next_button.setToolTip("Replace Next")
-        self.replace_next_button.setStyle(FindAndReplaceWidget.StyleProxy())
+        self.replace_next_button.setStyle(FindAndReplaceWidget._SHARED_STYLE)
 
         # replace all button
         self.replace_all_button: QPushButton = QPushButton()
         self.replace_all_button.setText("Replace All")
         self.replace_all_button.setToolTip("Replace All")
-        self.replace_all_button.setStyle(FindAndReplaceWidget.StyleProxy())
+        self.replace_all_button.setStyle(FindAndReplaceWidget._SHARED_STYLE)
 
         # ----------------------------------------------------------------------
         # ---------------------------- Place items -----------------------------
@@ -209,6 +259,10 @@ class FindAndReplaceWidget(QWidget):
         # -------------------------- Connect Signals ---------------------------
         # ----------------------------------------------------------------------
 
+        # search text
+        self.search_text.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.search_text_changed)
+
         # find buttons
         self.find_next_button.clicked.connect(self.find_next_clicked)
         self.mark_all_button.clicked.connect(self.mark_all_button_clicked)
@@ -237,6 +291,21 @@ class FindAndReplaceWidget(QWidget):
 
         return search_flags
 
+    @pyqtSlot()
+    def search_text_changed(self) -> None:
+        """
+        Search for the search text incrementally, once typing paused (search timer timed out)
+
+        :return: None
+        :rtype: None
+        """
+        search_criteria: SearchFlags = self.get_search_flags()
+        search_criteria |= SearchFlags.Incremental
+        search_expr: str = self.search_text.text()
+        if not search_expr:
+            return
+        self.SearchQuery.emit(search_expr, search_criteria)
+
     @pyqtSlot(bool)
     def find_next_clicked(self, checked: bool) -> None:
         search_criteria: SearchFlags = self.get_search_flags()
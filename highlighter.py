@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 
+import collections
 import pathlib
+import re
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional, OrderedDict, Set, Tuple
 
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -31,20 +33,88 @@ class MindustryLogicSyntaxHighlighter(QSyntaxHighlighter):
 
         __slots__ = ["pattern", "format"]
 
-        def __init__(self, pattern: QRegularExpression, rule_format: QTextCharFormat):
+        def __init__(self, pattern: str, rule_format: QTextCharFormat):
             """Initialize highlighting rule instance"""
-            self.pattern: QRegularExpression = pattern
+            # \w \d \s & \b are ASCII only, as they are in Qt's regular expressions
+            self.pattern: re.Pattern = re.compile(pattern, re.ASCII)
             self.format: QTextCharFormat = rule_format
 
+    class CombinedHighlightingRule(object):
+        """Highlighting rules matched together in a single pass, one pattern group per rule"""
+
+        __slots__ = ["pattern", "formats"]
+
+        def __init__(self, rules: List["MindustryLogicSyntaxHighlighter.HighlightingRule"]):
+            """Initialize combined highlighting rule instance"""
+            # where several rules match at the same position, a rule listed later takes precedence, just as
+            # its format would override the formats of the rules before it
+            self.pattern: re.Pattern = re.compile(
+                "|".join(f"({rule.pattern.pattern})" for rule in reversed(rules)),
+                re.ASCII
+            )
+            # rule format by the number of the group that matched
+            self.formats: List[Optional[QTextCharFormat]] = [None] + [rule.format for rule in reversed(rules)]
+
+    # number of off screen blocks highlighted per event loop turn, after the visible blocks are highlighted
+    DEFERRED_BLOCKS_PER_STEP: int = 50
+
+    # number of block texts whose formats are kept, so blocks with the same text are not matched again
+    BLOCK_FORMATS_CACHE_SIZE: int = 4096
+
+    # syntax keywords & highlighting rules built from the syntax file, keyed by its path & modification time
+    _rules_cache_key: Optional[Tuple[str, float]] = None
+    _rules_cache: Optional[Tuple[Dict[str, List[str]], List["MindustryLogicSyntaxHighlighter.CombinedHighlightingRule"],
+                                 QTextCharFormat]] = None
+
     def __init__(self, text_document: QTextDocument):
         super(MindustryLogicSyntaxHighlighter, self).__init__(text_document)
         self.text_document: QTextDocument = text_document
+
+        # deferred highlighting: blocks are left unformatted while deferred, then the visible blocks are
+        # highlighted first, and the remaining blocks are highlighted a few at a time from the cursor on
+        self.deferred: bool = False
+        self.deferred_blocks_cursor: Optional[QTextCursor] = None
+        self.highlighted_ahead: Set[int] = set()
+        self.deferred_blocks_timer: QTimer = QTimer(self)
+        self.deferred_blocks_timer.setSingleShot(True)
+        self.deferred_blocks_timer.setInterval(0)
+        self.deferred_blocks_timer.timeout.connect(self.highlight_next_blocks)
+        self.text_document.blockCountChanged.connect(self.forget_highlighted_ahead)
+
+        # highlighting rules, shared by all highlighters
         self.syntax_file: pathlib.Path = pathlib.Path("config").joinpath("syntax.json")
-        self.highlighting_rules: List[MindustryLogicSyntaxHighlighter.HighlightingRule] = list()
+        syntax, highlighting_rules, comment_format = type(self).build_highlighting_rules(self.syntax_file)
+        self.syntax: Dict[str, List[str]] = syntax
+        self.highlighting_rules: List[MindustryLogicSyntaxHighlighter.CombinedHighlightingRule] = highlighting_rules
+        self.comment_format: QTextCharFormat = comment_format
+
+        # block formats (start, length, format) by block text, least recently used first
+        self.block_formats_cache: OrderedDict[str, List[Tuple[int, int, QTextCharFormat]]] = \
+            collections.OrderedDict()
+
+    @classmethod
+    def build_highlighting_rules(cls, syntax_file: pathlib.Path) \
+            -> Tuple[Dict[str, List[str]], List["MindustryLogicSyntaxHighlighter.CombinedHighlightingRule"],
+                     QTextCharFormat]:
+        """
+        Parse syntax file and build highlighting rules, rules are built once and rebuilt only when the
+        syntax file changes
+
+        :param syntax_file: syntax file path
+        :type syntax_file: pathlib.Path
+        :return: syntax keywords, code highlighting rules & comment format
+        :rtype: Tuple[Dict[str, List[str]], List[MindustryLogicSyntaxHighlighter.CombinedHighlightingRule],
+            QTextCharFormat]
+        """
+        cache_key: Tuple[str, float] = (str(syntax_file.resolve()), syntax_file.stat().st_mtime)
+        if cache_key == cls._rules_cache_key:
+            return cls._rules_cache
 
         # get syntax
-        self.syntax: Dict[str, List[str]] = SyntaxFileParser.parse_syntax_file(self.syntax_file)
-        syntax_regex: Dict[str, List[str]] = self.generate_regex_syntax(self.syntax)
+        syntax: Dict[str, List[str]] = SyntaxFileParser.parse_syntax_file(syntax_file)
+        syntax_regex: Dict[str, str] = cls.generate_regex_syntax(syntax)
+        function_rules: List[MindustryLogicSyntaxHighlighter.HighlightingRule] = list()
+        highlighting_rules: List[MindustryLogicSyntaxHighlighter.HighlightingRule] = list()
 
         # ----------------------------------------------------------------------
         # ------------------------- highlighting rules -------------------------
@@ -54,11 +124,10 @@ class MindustryLogicSyntaxHighlighter(QSyntaxHighlighter):
         function_format: QTextCharFormat = QTextCharFormat()  # magenta, bold
         function_format.setForeground(QBrush(QColor(200, 25, 130)))
         function_format.setFontWeight(QFont.DemiBold)
-        function_patterns: List[str] = syntax_regex.get("builtin_functions", list())
-        for pattern in function_patterns:
-            self.highlighting_rules.append(
+        if "builtin_functions" in syntax_regex:
+            function_rules.append(
                 MindustryLogicSyntaxHighlighter.HighlightingRule(
-                    pattern=QRegularExpression(pattern),
+                    pattern=syntax_regex["builtin_functions"],
                     rule_format=function_format
                 )
             )
@@ -66,11 +135,10 @@ class MindustryLogicSyntaxHighlighter(QSyntaxHighlighter):
         # ------------------------ functions parameters ------------------------
         function_params_format: QTextCharFormat = QTextCharFormat()  # purple, normal
         function_params_format.setForeground(QBrush(QColor(190, 30, 170)))
-        function_params_patterns = syntax_regex.get("params")
-        for pattern in function_params_patterns:
-            self.highlighting_rules.append(
+        if "params" in syntax_regex:
+            highlighting_rules.append(
                 MindustryLogicSyntaxHighlighter.HighlightingRule(
-                    pattern=QRegularExpression(pattern),
+                    pattern=syntax_regex["params"],
                     rule_format=function_params_format
                 )
             )
@@ -78,9 +146,9 @@ class MindustryLogicSyntaxHighlighter(QSyntaxHighlighter):
         # ------------------------------- digits -------------------------------
         digit_format: QTextCharFormat = QTextCharFormat()  # blue, normal
         digit_format.setForeground(QBrush(QColor(30, 80, 210)))
-        self.highlighting_rules.append(
+        highlighting_rules.append(
             MindustryLogicSyntaxHighlighter.HighlightingRule(
-                pattern=QRegularExpression("\\b[-+]?[0-9]*\\.?[0-9]+([eE][+-]?[0-9]+)?\\b"),
+                pattern="\\b[-+]?[0-9]*\\.?[0-9]+(?:[eE][+-]?[0-9]+)?\\b",
                 rule_format=digit_format
             )
         )
@@ -88,9 +156,9 @@ class MindustryLogicSyntaxHighlighter(QSyntaxHighlighter):
         # --------------------------- string literals --------------------------
         string_literal_format: QTextCharFormat = QTextCharFormat()  # orange, normal
         string_literal_format.setForeground(QBrush(QColor(250, 130, 60)))
-        self.highlighting_rules.append(
+        highlighting_rules.append(
             MindustryLogicSyntaxHighlighter.HighlightingRule(
-                pattern=QRegularExpression("\"[\\w \\d]*\"|\'[\\w \\d]*\'"),
+                pattern="\"[\\w \\d]*\"|\'[\\w \\d]*\'",
                 rule_format=string_literal_format
             )
         )
@@ -98,64 +166,220 @@ class MindustryLogicSyntaxHighlighter(QSyntaxHighlighter):
         # -------------------------- special variables -------------------------
         special_variable_format: QTextCharFormat = QTextCharFormat()  # blue, italic
         special_variable_format.setForeground(QBrush(QColor(25, 90, 230)))
-        for pattern in syntax_regex.get("special_variables"):
-            self.highlighting_rules.append(
-                MindustryLogicSyntaxHighlighter.HighlightingRule(
-                    pattern=QRegularExpression(pattern),
-                    rule_format=special_variable_format
-                )
-            )
-
-        self.highlighting_rules.append(
+        # every special variable starts with @, so the special variables keywords are all matched by
+        # the same rule as other @ variables
+        highlighting_rules.append(
             MindustryLogicSyntaxHighlighter.HighlightingRule(
-                pattern=QRegularExpression("\\B@[a-zA-Z][a-zA-Z0-9\\-]*\\b"),
+                pattern="\\B@[a-zA-Z][a-zA-Z0-9\\-]*\\b",
                 rule_format=special_variable_format
             )
         )
 
         # ------------------------------ comments ------------------------------
+        # a comment runs from the first # to the end of the line, and overrides any other format there, so
+        # it needs no pattern, only its format
         comment_format = QTextCharFormat()  # dark green, normal
         comment_format.setForeground(QBrush(QColor(90, 170, 35)))
-        self.highlighting_rules.append(
-            MindustryLogicSyntaxHighlighter.HighlightingRule(
-                pattern=QRegularExpression("#.*$"),
-                rule_format=comment_format
-            )
-        )
+
+        # the rules are matched in a single pass, except for builtin functions: their matches take in the
+        # leading white space of the line, and would hide a parameter match of the same keyword
+        combined_rules: List[MindustryLogicSyntaxHighlighter.CombinedHighlightingRule] = [
+            MindustryLogicSyntaxHighlighter.CombinedHighlightingRule(rules)
+            for rules in (function_rules, highlighting_rules) if rules
+        ]
+
+        cls._rules_cache_key = cache_key
+        cls._rules_cache = (syntax, combined_rules, comment_format)
+        return cls._rules_cache
 
     @staticmethod
-    def generate_regex_syntax(syntax: dict) -> dict:
+    def generate_regex_syntax(syntax: Dict[str, List[str]]) -> Dict[str, str]:
         """
+        Generate a single regular expression per syntax category, matching any of the category's keywords
 
-
-        :param syntax:
-        :type syntax:
-        :return:
-        :rtype:
+        :param syntax: syntax keywords per category
+        :type syntax: Dict[str, List[str]]
+        :return: regular expression per category
+        :rtype: Dict[str, str]
         """
-        regex_patterns = {k: [] for k in syntax.keys()}
+        # keywords are matched literally, longer keywords first, so a keyword is never cut short by one of
+        # its prefixes
+        alternatives: Dict[str, str] = {
+            category: "|".join(
+                re.escape(keyword)
+                for keyword in sorted(set(keywords), key=lambda keyword: (-len(keyword), keyword))
+            )
+            for category, keywords in syntax.items()
+        }
 
-        # special_variables
-        for pattern in syntax.get("special_variables", list()):
-            regex_patterns["special_variables"].append(f"\\B{pattern}\\b")
+        regex_patterns: Dict[str, str] = dict()
 
         # functions
-        for pattern in syntax.get("builtin_functions", list()):
-            regex_patterns["builtin_functions"].append(f"^\\s*?{pattern}\\b")
+        if alternatives.get("builtin_functions"):
+            regex_patterns["builtin_functions"] = f"^\\s*?(?:{alternatives['builtin_functions']})\\b"
 
         # params
-        for pattern in syntax.get("params", list()):
-            regex_patterns["params"].append(f"\\b{pattern}\\b")
+        if alternatives.get("params"):
+            regex_patterns["params"] = f"\\b(?:{alternatives['params']})\\b"
 
         return regex_patterns
 
+    def defer_highlighting(self) -> None:
+        """
+        Stop highlighting blocks, until highlight_deferred_blocks is called
+
+        :return: None
+        :rtype: None
+        """
+        self.deferred = True
+
+    def highlight_deferred_blocks(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        """
+        Resume highlighting, highlight visible blocks now and the whole document in the background
+
+        :param first_block: first visible block
+        :type first_block: QTextBlock
+        :param last_block: last visible block
+        :type last_block: QTextBlock
+        :return: None
+        :rtype: None
+        """
+        self.deferred = False
+        self.deferred_blocks_cursor = QTextCursor(self.text_document)
+        self.highlighted_ahead = set()
+        self.highlight_visible_blocks(first_block, last_block)
+        self.deferred_blocks_timer.start()
+
+    def has_deferred_blocks(self) -> bool:
+        """
+        Test whether some blocks are still waiting to be highlighted
+
+        :return: True if some blocks are not highlighted yet, False otherwise
+        :rtype: bool
+        """
+        return self.deferred_blocks_cursor is not None
+
+    def highlight_visible_blocks(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        """
+        Highlight visible blocks ahead of the background highlighting, each block is highlighted ahead only once
+
+        :param first_block: first visible block
+        :type first_block: QTextBlock
+        :param last_block: last visible block
+        :type last_block: QTextBlock
+        :return: None
+        :rtype: None
+        """
+        if self.deferred_blocks_cursor is None:
+            return
+
+        next_block_number: int = self.deferred_blocks_cursor.blockNumber()
+        last_block_number: int = last_block.blockNumber()
+        text_block: QTextBlock = first_block
+        while text_block.isValid() and text_block.blockNumber() <= last_block_number:
+            block_number: int = text_block.blockNumber()
+            if block_number >= next_block_number and block_number not in self.highlighted_ahead:
+                self.highlighted_ahead.add(block_number)
+                self.rehighlightBlock(text_block)
+            text_block = text_block.next()
+
+    @pyqtSlot(int)
+    def forget_highlighted_ahead(self, block_count: int) -> None:
+        """
+        Forget which blocks were highlighted ahead, adding or removing lines changes the numbers of the blocks
+        after them. Those blocks are highlighted again, instead of skipping blocks that weren't highlighted
+
+        :param block_count: new number of blocks
+        :type block_count: int
+        :return: None
+        :rtype: None
+        """
+        self.highlighted_ahead = set()
+
+    @pyqtSlot()
+    def highlight_next_blocks(self) -> None:
+        """
+        Highlight the next few blocks waiting to be highlighted, and schedule the rest
+
+        :return: None
+        :rtype: None
+        """
+        if self.deferred_blocks_cursor is None:
+            return
+
+        text_block: QTextBlock = self.deferred_blocks_cursor.block()
+        for _ in range(MindustryLogicSyntaxHighlighter.DEFERRED_BLOCKS_PER_STEP):
+            if not text_block.isValid():
+                break
+            if text_block.blockNumber() not in self.highlighted_ahead:
+                self.rehighlightBlock(text_block)
+            text_block = text_block.next()
+
+        if not text_block.isValid():
+            self.deferred_blocks_cursor = None
+            self.highlighted_ahead = set()
+            return
+
+        self.deferred_blocks_cursor.setPosition(text_block.position())
+        self.deferred_blocks_timer.start()
+
+    def match_block_formats(self, text: str) -> List[Tuple[int, int, QTextCharFormat]]:
+        """
+        Match highlighting rules against a block's text
+
+        :param text: block text
+        :type text: str
+        :return: formats to set on the block, in order, as (start, length, format)
+        :rtype: List[Tuple[int, int, QTextCharFormat]]
+        """
+        # formats after the first # would all be overridden by the comment format, so the other rules
+        # only match the code before it, and the comment gets a single format
+        comment_start: int = text.find("#")
+        code_text: str = text if comment_start < 0 else text[:comment_start]
+
+        # block positions count UTF-16 code units, which are the same as python string indices unless the
+        # block has characters outside the BMP, which take 2 code units each
+        utf16_positions: Optional[List[int]] = None
+        if not text.isascii() and len(text.encode("utf-16-le")) != 2 * len(text):
+            utf16_positions = [0]
+            for char in text:
+                utf16_positions.append(utf16_positions[-1] + (2 if ord(char) > 0xFFFF else 1))
+
+        block_formats: List[Tuple[int, int, QTextCharFormat]] = list()
+        add_format = block_formats.append
+        for rule in self.highlighting_rules:
+            rule_formats: List[Optional[QTextCharFormat]] = rule.formats
+            for match in rule.pattern.finditer(code_text):
+                match_start, match_end = match.span()
+                if utf16_positions is not None:
+                    match_start, match_end = utf16_positions[match_start], utf16_positions[match_end]
+                add_format((match_start, match_end - match_start, rule_formats[match.lastindex]))
+
+        if comment_start >= 0:
+            match_start, match_end = comment_start, len(text)
+            if utf16_positions is not None:
+                match_start, match_end = utf16_positions[match_start], utf16_positions[match_end]
+            block_formats.append((match_start, match_end - match_start, self.comment_format))
+
+        return block_formats
+
     def highlightBlock(self, text: str) -> None:
         """Highlight a text block in text document"""
-        for rule in self.highlighting_rules:
-            match_iterator = rule.pattern.globalMatch(text)
-            while match_iterator.hasNext():
-                match: QRegularExpressionMatch = match_iterator.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), rule.format)
+        if self.deferred:
+            return
+
+        block_formats: Optional[List[Tuple[int, int, QTextCharFormat]]] = self.block_formats_cache.get(text)
+        if block_formats is None:
+            block_formats = self.match_block_formats(text)
+            self.block_formats_cache[text] = block_formats
+            if len(self.block_formats_cache) > MindustryLogicSyntaxHighlighter.BLOCK_FORMATS_CACHE_SIZE:
+                self.block_formats_cache.popitem(last=False)
+        else:
+            self.block_formats_cache.move_to_end(text)
+
+        set_format = self.setFormat
+        for start, length, text_format in block_formats:
+            set_format(start, length, text_format)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os
 import pathlib
 import sys
 import logging as log
-import inspect
+from typing import List, Optional
 
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
+from editor_utils import load_icon
 from mindustry_editor import MindustryLogicEditor
 from find_replace_widget import FindAndReplaceWidget, SearchFlags
 
@@ -31,14 +31,24 @@ class MainWindow(QMainWindow):
 
         self.logger: log.Logger = log.getLogger(self.__class__.__name__)
 
+        # window title updates requested during an event loop pass, applied once at its end
+        self.update_title_timer: QTimer = QTimer(self)
+        self.update_title_timer.setSingleShot(True)
+        self.update_title_timer.setInterval(0)
+        self.update_title_timer.timeout.connect(self.update_title)
+
         # --------------------------- GUI components ---------------------------
 
         self.container: QWidget = QWidget(parent=self)  # container
 
         self.tab_widget: QTabWidget = QTabWidget()  # tab widget
 
-        self.find_and_replace_widget: FindAndReplaceWidget = FindAndReplaceWidget(self)
-        self.find_and_replace_widget.setHidden(True)
+        # find and replace widget, created the first time it's shown
+        self.find_and_replace_widget: Optional[FindAndReplaceWidget] = None
+
+        # error & confirmation message boxes, created the first time they're shown, then reused
+        self.error_message_box: Optional[QMessageBox] = None
+        self.confirm_message_box: Optional[QMessageBox] = None
 
         self.status_bar: QStatusBar = QStatusBar()  # status bar
         self.file_menu: QMenu = QMenu("&File")  # file menu
@@ -57,7 +67,6 @@ class MainWindow(QMainWindow):
 
         layout: QVBoxLayout = QVBoxLayout()
         layout.addWidget(self.tab_widget)
-        layout.addWidget(self.find_and_replace_widget)
         self.container.setLayout(layout)
 
         # set container as central widget
@@ -81,7 +90,7 @@ class MainWindow(QMainWindow):
 
         # new file
         new_file_action = QAction(
-            QIcon(os.path.join("images", "new-file.png")),
+            load_icon("new-file.png"),
             "Create new file...",
             self
         )
@@ -94,7 +103,7 @@ class MainWindow(QMainWindow):
 
         # open file
         open_file_action = QAction(
-            QIcon(os.path.join("images", "open-file.png")),
+            load_icon("open-file.png"),
             "Open file...",
             self
         )
@@ -107,7 +116,7 @@ class MainWindow(QMainWindow):
 
         # save file
         save_file_action = QAction(
-            QIcon(os.path.join("images", "save-file.png")),
+            load_icon("save-file.png"),
             "Save file...",
             self
         )
@@ -120,7 +129,7 @@ class MainWindow(QMainWindow):
 
         # save file as
         save_file_as_action = QAction(
-            QIcon(os.path.join("images", "save-file-as.png")),
+            load_icon("save-file-as.png"),
             "Save file as...",
             self
         )
@@ -164,7 +173,7 @@ class MainWindow(QMainWindow):
 
         # select all
         self.select_all_action = QAction(
-            QIcon(os.path.join("images", "select-all.png")),
+            load_icon("select-all.png"),
             "Select all text...",
             self
         )
@@ -176,7 +185,7 @@ class MainWindow(QMainWindow):
 
         # cut (shortcut already implemented)
         self.cut_action = QAction(
-            QIcon(os.path.join("images", "cut-text.png")),
+            load_icon("cut-text.png"),
             "Cut selected text...",
             self
         )
@@ -185,7 +194,7 @@ class MainWindow(QMainWindow):
 
         # copy (shortcut already implemented)
         self.copy_action = QAction(
-            QIcon(os.path.join("images", "copy-text.png")),
+            load_icon("copy-text.png"),
             "Copy selected text...",
             self
         )
@@ -194,7 +203,7 @@ class MainWindow(QMainWindow):
 
         # paste (shortcut already implemented)
         self.paste_action = QAction(
-            QIcon(os.path.join("images", "paste-text.png")),
+            load_icon("paste-text.png"),
             "Paste text from clipboard...",
             self
         )
@@ -207,7 +216,7 @@ class MainWindow(QMainWindow):
 
         # undo (shortcut already implemented)
         self.undo_action = QAction(
-            QIcon(os.path.join("images", "undo.png")),
+            load_icon("undo.png"),
             "Undo last change...",
             self
         )
@@ -216,7 +225,7 @@ class MainWindow(QMainWindow):
 
         # redo (shortcut already implemented)
         self.redo_action = QAction(
-            QIcon(os.path.join("images", "redo.png")),
+            load_icon("redo.png"),
             "Redo last change...",
             self
         )
@@ -229,7 +238,7 @@ class MainWindow(QMainWindow):
 
         # Find and replace
         find_and_replace_action = QAction(
-            QIcon(os.path.join("images", "search.png")),
+            load_icon("search.png"),
             "Find and replace",
             self
         )
@@ -245,19 +254,22 @@ class MainWindow(QMainWindow):
         # add status bar
         self.setStatusBar(self.status_bar)
 
-        # -------------------------- Signals & Slots ---------------------------
-        self.find_and_replace_widget.SearchQuery.connect(self.editor_find_string)
-        self.find_and_replace_widget.ReplaceQuery.connect(self.editor_replace_string)
-
-        # create new file
-        self.create_new_file()
+        # create new file, once the event loop runs, so the window is shown first
+        QTimer.singleShot(0, self.create_new_file)
 
     def show_error(self, message: str) -> None:
         """Show error in a message box to user"""
-        error: QMessageBox = QMessageBox(parent=self)
-        error.setText(message)
-        error.setIcon(QMessageBox.Critical)
-        error.exec_()
+        if self.error_message_box is None:
+            self.error_message_box = QMessageBox(parent=self)
+            self.error_message_box.setIcon(QMessageBox.Critical)
+
+        # an error reported while the box is open (e.g. another tab's auto save) is added to the shown errors
+        if self.error_message_box.isVisible():
+            self.error_message_box.setText(f"{self.error_message_box.text()}\n{message}")
+            return
+
+        self.error_message_box.setText(message)
+        self.error_message_box.exec_()
 
     def confirm_message(self, message_text: str) -> int:
         """
@@ -268,11 +280,13 @@ class MainWindow(QMainWindow):
         :return: QMessageBox.Save, QMessageBox.Discard, QMessageBox.Cancel
         :rtype: QMessageBox.StandardButton (int)
         """
-        message: QMessageBox = QMessageBox(parent=self)
-        message.setText(message_text)
-        message.setIcon(QMessageBox.Warning)
-        message.setStandardButtons(QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
-        return message.exec_()
+        if self.confirm_message_box is None:
+            self.confirm_message_box = QMessageBox(parent=self)
+            self.confirm_message_box.setIcon(QMessageBox.Warning)
+            self.confirm_message_box.setStandardButtons(QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+
+        self.confirm_message_box.setText(message_text)
+        return self.confirm_message_box.exec_()
 
     def bind_editor_shortcuts(self, editor: MindustryLogicEditor) -> None:
         """
@@ -290,7 +304,9 @@ class MainWindow(QMainWindow):
         self.undo_action.triggered.connect(editor.undo)
         self.redo_action.triggered.connect(editor.redo)
         editor.modificationChanged.connect(self.editor_content_changed)
+        editor.AutoSaveFailed.connect(self.show_error)
 
+    @pyqtSlot()
     def update_title(self) -> None:
         """Update editor window title"""
 
@@ -305,27 +321,50 @@ class MainWindow(QMainWindow):
             return
 
         editor_path: pathlib.Path = current_editor.path
-        open_file_name: str = current_editor.get_open_file_name()
-
-        if current_editor.is_modified():
-            open_file_name = f"{open_file_name} *"
 
         if editor_path is None:
             editor_title = f"new file * | {editor_title}"
-            open_file_name = "new file *"
-            self.tab_widget.tabBar().setTabTextColor(self.tab_widget.currentIndex(), Qt.red)
         elif current_editor.is_modified():
-            editor_title = f"{str(editor_path)} * | {editor_title}"
-            self.tab_widget.tabBar().setTabTextColor(self.tab_widget.currentIndex(), Qt.red)
+            editor_title = f"{editor_path} * | {editor_title}"
         else:
-            editor_title = f"{str(editor_path)} | {editor_title}"
-            self.tab_widget.tabBar().setTabTextColor(self.tab_widget.currentIndex(), Qt.black)
+            editor_title = f"{editor_path} | {editor_title}"
 
+        self.update_tab_text(self.tab_widget.currentIndex(), current_editor)
         self.setWindowTitle(editor_title)
-        self.tab_widget.setTabText(self.tab_widget.currentIndex(), open_file_name)
 
-        self.logger.debug(f"Updating title for {open_file_name=}")
+        self.logger.debug("Updating title for editor_path=%s", editor_path)
+
+    def update_tab_text(self, tab_index: int, editor: MindustryLogicEditor) -> None:
+        """
+        Update an editor's tab text & color, after its file was saved or modified
+
+        :param tab_index: editor's tab index
+        :type tab_index: int
+        :param editor: editor instance
+        :type editor: MindustryLogicEditor
+        :return: None
+        :rtype: None
+        """
+        open_file_name: str = editor.get_open_file_name()
+
+        tab_text_color: QColor
+        if editor.path is None:
+            open_file_name = "new file *"
+            tab_text_color = QColor(Qt.red)
+        elif editor.is_modified():
+            open_file_name = f"{open_file_name} *"
+            tab_text_color = QColor(Qt.red)
+        else:
+            tab_text_color = QColor(Qt.black)
+
+        # changing a tab's text or color lays out the tab bar again, even if it's the same
+        tab_bar: QTabBar = self.tab_widget.tabBar()
+        if tab_bar.tabTextColor(tab_index) != tab_text_color:
+            tab_bar.setTabTextColor(tab_index, tab_text_color)
+        if tab_bar.tabText(tab_index) != open_file_name:
+            tab_bar.setTabText(tab_index, open_file_name)
 
+    @pyqtSlot()
     def create_new_file(self) -> None:
         """new editor file"""
         self.add_editor_tab()
@@ -333,12 +372,13 @@ class MainWindow(QMainWindow):
         editor.setObjectName(f"tab#{self.tab_widget.currentIndex()}")
         editor.create_new_file()
         editor.setFocus()
-        self.update_title()
-        self.logger.debug(f"New file created in tab: {self.tab_widget.currentIndex()}")
+        self.update_title_timer.start()
+        self.logger.debug("New file created in tab: %d", self.tab_widget.currentIndex())
 
+    @pyqtSlot()
     def open_file(self) -> None:
         """Open an existing file"""
-        self.logger.debug(f"Opening a file")
+        self.logger.debug("Opening a file")
 
         update_enable: bool = self.tab_widget.updatesEnabled()
         self.tab_widget.setUpdatesEnabled(False)
@@ -360,7 +400,7 @@ class MainWindow(QMainWindow):
 
         # open was canceled
         if current_editor.path is None:
-            self.logger.debug(f"Open file as cancelled")
+            self.logger.debug("Open file as cancelled")
             if new_tab:
                 self.close_current_tab()
             return
@@ -384,11 +424,11 @@ class MainWindow(QMainWindow):
 
             tab_file_name: str = tab_editor.get_open_file_name()  # file open in the tab
             if tab_file_name == file_name:
-                self.logger.debug(f"file {file_name} is already open in tab: {tab_index}")
+                self.logger.debug("file %s is already open in tab: %d", file_name, tab_index)
                 self.tab_widget.setCurrentIndex(tab_index)
                 other_editor: MindustryLogicEditor = self.get_current_editor()  # get other file's editor
                 other_editor.create_new_file()
-                self.update_title()
+                self.update_title()  # right away, while the other file's tab is the current tab
                 break
 
         self.tab_widget.setCurrentIndex(current_tab)
@@ -396,21 +436,23 @@ class MainWindow(QMainWindow):
         current_editor.setFocus()  # set focus on current tab editor
 
         self.tab_widget.setUpdatesEnabled(update_enable)
-        self.update_title()  # update window title
+        self.update_title_timer.start()  # update window title
 
-        self.logger.debug(f"File opened: {file_name} in tab {current_tab}")
+        self.logger.debug("File opened: %s in tab %d", file_name, current_tab)
 
+    @pyqtSlot()
     def save_file(self) -> None:
         """Save current open file"""
         self.get_current_editor().save_file()
-        self.update_title()
-        self.logger.debug(f"File saved")
+        self.update_title_timer.start()
+        self.logger.debug("File saved")
 
+    @pyqtSlot()
     def save_file_as(self) -> None:
         """Save current file as another file"""
         self.get_current_editor().save_file_as()
-        self.update_title()
-        self.logger.debug(f"File save as")
+        self.update_title_timer.start()
+        self.logger.debug("File save as")
 
     def add_editor_tab(self) -> None:
         """
@@ -433,12 +475,12 @@ class MainWindow(QMainWindow):
         self.tab_widget.setUpdatesEnabled(False)
         tab_index: int = self.tab_widget.addTab(
             editor,
-            QIcon(os.path.join("images", "file.png")),
+            load_icon("file.png"),
             editor.get_open_file_name()
         )
         self.tab_widget.setCurrentIndex(tab_index)
         self.tab_widget.setUpdatesEnabled(True)
-        self.logger.debug(f"Added a new editor in tab: {tab_index}")
+        self.logger.debug("Added a new editor in tab: %d", tab_index)
 
     def get_current_editor(self) -> MindustryLogicEditor:
         """
@@ -449,6 +491,7 @@ class MainWindow(QMainWindow):
         """
         return self.tab_widget.currentWidget()
 
+    @pyqtSlot()
     def close_current_tab(self) -> None:
         """
         Close current open tab
@@ -460,7 +503,7 @@ class MainWindow(QMainWindow):
         current_editor: MindustryLogicEditor = self.get_current_editor()
         current_file_name: str = current_editor.get_open_file_name()
 
-        self.logger.debug(f"Closing current tab {self.tab_widget.currentIndex()}: {current_file_name}")
+        self.logger.debug("Closing current tab %d: %s", self.tab_widget.currentIndex(), current_file_name)
 
         if current_editor.is_modified():
             confirm_save: int = self.confirm_message(f"Save file {current_file_name} before closing?")
@@ -473,6 +516,7 @@ class MainWindow(QMainWindow):
 
         self.close_tab(self.tab_widget.currentIndex())
 
+    @pyqtSlot()
     def close_editor(self) -> None:
         """
         Close editor window
@@ -482,6 +526,7 @@ class MainWindow(QMainWindow):
         """
         self.close()
 
+    @pyqtSlot()
     def switch_tab(self) -> None:
         """
         switch current tab
@@ -492,7 +537,7 @@ class MainWindow(QMainWindow):
         current_tab_index: int = self.tab_widget.currentIndex()
         new_tab_index: int = (current_tab_index + 1) % self.tab_widget.count()
         self.tab_widget.setCurrentIndex(new_tab_index)
-        self.logger.debug(f"Switching tabs from {current_tab_index} to {new_tab_index}")
+        self.logger.debug("Switching tabs from %d to %d", current_tab_index, new_tab_index)
 
     def closeEvent(self, event: QCloseEvent) -> None:
         close_confirm: int = self.confirm_message(f"Any unsaved files will be discarded. Confirm closing the editor?")
@@ -500,12 +545,14 @@ class MainWindow(QMainWindow):
         if close_confirm in (QMessageBox.Cancel, QMessageBox.No):
             return
 
-        for tab_index in range(self.tab_widget.count()):
-            tab_editor: MindustryLogicEditor = self.tab_widget.widget(tab_index)
+        # collect the editors first, each editor is deleted once closed, which removes its tab
+        tab_editors: List[MindustryLogicEditor] = [
+            self.tab_widget.widget(tab_index) for tab_index in range(self.tab_widget.count())
+        ]
+        for tab_editor in tab_editors:
             tab_editor.close()
-            tab_editor.deleteLater()
 
-        self.logger.debug(f"Closing the editor")
+        self.logger.debug("Closing the editor")
 
         super(MainWindow, self).closeEvent(event)
 
@@ -519,11 +566,14 @@ class MainWindow(QMainWindow):
         :rtype: None
         """
         super(MainWindow, self).timerEvent(event)
-        current_editor: MindustryLogicEditor = self.get_current_editor()
-        current_editor.auto_save()
-        self.update_title()
-        self.logger.debug(f"Timer event: auto save")
+        # auto save all tabs, editors skip unmodified or unsaved files & write the others in the thread pool
+        for tab_index in range(self.tab_widget.count()):
+            # tab text & title are updated by the editor's modificationChanged signal
+            self.tab_widget.widget(tab_index).auto_save()
 
+        self.logger.debug("Timer event: auto save")
+
+    @pyqtSlot()
     def pop_find_and_replace_widget(self) -> None:
         """
         show find and replace widget
@@ -531,6 +581,12 @@ class MainWindow(QMainWindow):
         :return:
         :rtype:
         """
+        if self.find_and_replace_widget is None:
+            self.find_and_replace_widget = FindAndReplaceWidget(self)
+            self.find_and_replace_widget.SearchQuery.connect(self.editor_find_string)
+            self.find_and_replace_widget.ReplaceQuery.connect(self.editor_replace_string)
+            self.container.layout().addWidget(self.find_and_replace_widget)
+
         if self.find_and_replace_widget.isHidden():
             self.find_and_replace_widget.setHidden(False)
 
@@ -544,16 +600,25 @@ class MainWindow(QMainWindow):
         :return: None
         :rtype: None
         """
+        # editors don't handle close events, so the editor is deleted without closing it first
         editor: MindustryLogicEditor = self.tab_widget.widget(tab_index)
-        editor.close()
         self.tab_widget.removeTab(tab_index)
+        editor.deleteLater()
         if self.tab_widget.count() < 1:
             self.create_new_file()
 
     @pyqtSlot(bool)
     def editor_content_changed(self, changed: bool):
-        if changed:
-            self.update_title()
+        """Editor's document became modified, or unmodified after it was saved or its changes were undone"""
+        # editors in background tabs are auto saved too, only their tab text needs updating
+        editor: MindustryLogicEditor = self.sender()
+        tab_index: int = self.tab_widget.indexOf(editor)
+        if tab_index != self.tab_widget.currentIndex():
+            if tab_index > -1:
+                self.update_tab_text(tab_index, editor)
+            return
+
+        self.update_title_timer.start()
 
     @pyqtSlot(int)
     def current_tab_changed(self, new_tab_index: int) -> None:
@@ -564,7 +629,7 @@ class MainWindow(QMainWindow):
                 self.tab_widget.widget(tab_index).setUpdatesEnabled(False)
 
             self.tab_widget.widget(new_tab_index).setUpdatesEnabled(True)
-            self.update_title()
+            self.update_title_timer.start()
 
     @pyqtSlot(str, SearchFlags)
     def editor_find_string(self, search_expr: str, search_flags: SearchFlags) -> None:
@@ -618,8 +683,9 @@ if __name__ == "__main__":
     )
 
     app = QApplication(sys.argv)
-    app.setWindowIcon(QIcon("images\\icon.ico"))
+    app_icon: QIcon = load_icon("icon.ico")
+    app.setWindowIcon(app_icon)
     win = MainWindow()
-    win.setWindowIcon(QIcon("images\\icon.ico"))
+    win.setWindowIcon(app_icon)
     win.showMaximized()
     sys.exit(app.exec_())
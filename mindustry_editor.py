@@ -2,9 +2,10 @@
 # -*- coding: utf-8 -*-
 
 
-import math
+import collections
+import functools
 import sys
-from typing import List, Optional, Union
+from typing import Dict, Iterable, List, Optional, OrderedDict, Set, Tuple, Union
 
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -14,11 +15,24 @@ from base_editor import BaseCodeEditor
 from completer import MindustryLogicCompleter
 from highlighter import MindustryLogicSyntaxHighlighter
 from syntax_file_parser import SyntaxFileParser
-from find_replace_widget import FindAndReplaceWidget, SearchFlags
+from find_replace_widget import FindAndReplaceWidget, SearchFlags, compile_search_regex, is_literal_expression
+
+
+@functools.lru_cache(maxsize=1)
+def _load_keywords(path: str = "config/syntax.json") -> Tuple[str, ...]:
+    """
+    Load keywords from syntax file, the file is parsed only once and shared by all editors
+
+    :param path: syntax file path
+    :type path: str
+    :return: keywords
+    :rtype: Tuple[str, ...]
+    """
+    return tuple(SyntaxFileParser(path).get_keywords())
 
 
 class LineNumberArea(QWidget):
-    """Mindustry Logic Editor line number area"""
+    """Mindustry Logic Editor line number area, shows both line numbers and code line numbers"""
 
     def __init__(self, editor, *args, **kwarg):
         super(LineNumberArea, self).__init__(*args, **kwarg)
@@ -32,11 +46,38 @@ class LineNumberArea(QWidget):
 
 
 class CodeLineNumber(QTextBlockUserData):
+    """
+    Line's code line number, packed with whether the line is a code line into a single int:
+    (number << 1) | is_code
+    """
+
+    __slots__ = ["packed"]
 
-    def __init__(self, number: Optional[int] = None, is_code: bool = False):
+    def __init__(self, packed: int = -2):
         super(CodeLineNumber, self).__init__()
-        self.number: Optional[int] = number
-        self.is_code: bool = is_code
+        self.packed: int = packed
+
+    @staticmethod
+    def pack(number: int, is_code: bool) -> int:
+        """
+        Pack a code line number and whether the line is a code line into a single int
+
+        :param number: code line number
+        :type number: int
+        :param is_code: True if the line is a code line
+        :type is_code: bool
+        :return: packed code line number
+        :rtype: int
+        """
+        return (number << 1) | is_code
+
+    @property
+    def number(self) -> int:
+        return self.packed >> 1
+
+    @property
+    def is_code(self) -> bool:
+        return bool(self.packed & 1)
 
     def __repr__(self):
         return f"{self.number=} {self.is_code=}"
@@ -55,6 +96,16 @@ class MindustryLogicEditor(BaseCodeEditor):
         - tabs
         """
 
+    # action shortcuts, shared by all editors
+    COMMENT_TOGGLE_SHORTCUT: QKeySequence = QKeySequence(Qt.Key_Slash | Qt.CTRL)
+    COMPLETER_SHORTCUT: QKeySequence = QKeySequence(Qt.Key_Space | Qt.CTRL)
+
+    # maximum number of laid out line number texts kept in cache
+    STATIC_TEXT_CACHE_SIZE: int = 4096
+
+    # line number area font shared by all editors, created with the first editor
+    _SHARED_LINE_NUMBER_FONT: Optional[QFont] = None
+
     def __init__(self, *args, **kwargs):
         """
         Initialize mindustry logic editor instance
@@ -68,41 +119,88 @@ class MindustryLogicEditor(BaseCodeEditor):
 
         # ------------------------- Editor components --------------------------
 
+        # editor font metrics, width of a single digit (the editor font is monospaced so every digit
+        # has the same width) & line height
+        self._font_metrics: QFontMetrics = self.fontMetrics()
+        self._digit_width: int = self._font_metrics.horizontalAdvance("9")
+        self._line_height: int = self._font_metrics.height()
+
+        # line number area width in pixels, for the last seen line count
+        self._line_count: int = 0
+        self._line_number_area_width: int = 0
+
         # line number area
         self.line_number_area: LineNumberArea = LineNumberArea(editor=self, parent=self)
-        self.line_number_area.setFont(QFont("Consolas", 14, QFont.ExtraLight))
+        if MindustryLogicEditor._SHARED_LINE_NUMBER_FONT is None:
+            MindustryLogicEditor._SHARED_LINE_NUMBER_FONT = QFont("Consolas", 14, QFont.ExtraLight)
+        self.line_number_area.setFont(MindustryLogicEditor._SHARED_LINE_NUMBER_FONT)
+
+        # line number area & code line number area background brushes
+        self._line_number_area_brush: QBrush = QBrush(QColor(200, 200, 200))  # light gray
+        self._code_line_number_area_brush: QBrush = QBrush(QColor(200, 200, 200).lighter(120))  # lighter gray
+
+        # pre-painted line number area background, rebuilt when the line number area is resized
+        self._gutter_bg_pixmap: QPixmap = QPixmap()
+
+        # laid out line number & code line number texts keyed by number, least recently used texts are
+        # dropped once the cache is full, cleared when the font changes
+        self._static_text_cache: OrderedDict[int, QStaticText] = collections.OrderedDict()
 
         # text highlighter
         self.highlighter: MindustryLogicSyntaxHighlighter = MindustryLogicSyntaxHighlighter(self.document())
 
         # auto completer widget
-        self.keywords = SyntaxFileParser("config/syntax.json").get_keywords()
+        self.keywords: Set[str] = set(_load_keywords())
         self.completer: Optional[MindustryLogicCompleter] = MindustryLogicCompleter(self.keywords)
         self.completer.setWidget(self)
         self.completer.setCompletionMode(QCompleter.PopupCompletion)
         self.completer.setCaseSensitivity(Qt.CaseSensitive)
         self.completer.activated.connect(self.insert_completion)
 
+        # last word under cursor, keyed by cursor position & document revision
+        self._text_under_cursor_key: Optional[Tuple[int, int]] = None
+        self._text_under_cursor_text: str = ""
+
+        # current line highlight color & the highlighted line
+        self._current_line_color: QColor = QColor(255, 215, 0).lighter(180)  # light gold
+        self._highlighted_block_number: int = -1
+
+        # current line is highlighted once the cursor settles, after a burst of cursor moves
+        self._highlight_current_line_timer: QTimer = QTimer(self)
+        self._highlight_current_line_timer.setSingleShot(True)
+        self._highlight_current_line_timer.setInterval(0)
+        self._highlight_current_line_timer.timeout.connect(self.highlight_current_line)
+
+        # range of lines changed since code line numbers were last updated, the cursors follow later edits
+        self._dirty_start_cursor: Optional[QTextCursor] = None
+        self._dirty_end_cursor: Optional[QTextCursor] = None
+        self._code_line_numbers_timer: QTimer = QTimer(self)
+        self._code_line_numbers_timer.setSingleShot(True)
+        self._code_line_numbers_timer.timeout.connect(self.update_code_line_numbers)
+
         # ------------------------------ Actions -------------------------------
 
         # add comment toggle action
         self.comment_toggle_action: QAction = QAction(self)
-        self.comment_toggle_action.setShortcut(QKeySequence(Qt.Key_Slash | Qt.CTRL))
+        self.comment_toggle_action.setShortcut(MindustryLogicEditor.COMMENT_TOGGLE_SHORTCUT)
         self.comment_toggle_action.triggered.connect(self.comment_toggle)
         self.addAction(self.comment_toggle_action)
 
         # add text completer action
         self.completer_action: QAction = QAction(self)
-        self.completer_action.setShortcut(QKeySequence(Qt.Key_Space | Qt.CTRL))
+        self.completer_action.setShortcut(MindustryLogicEditor.COMPLETER_SHORTCUT)
         self.completer_action.triggered.connect(self.auto_complete_action)
         self.addAction(self.completer_action)
 
         # -------------------------- slots & signals ---------------------------
-        self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.cursorPositionChanged.connect(self._highlight_current_line_timer.start)
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
+        self.document().contentsChange.connect(self.mark_code_line_numbers_dirty)
 
         # ------------------------------- start --------------------------------
+        self.mark_code_line_numbers_dirty(0, 0, self.document().characterCount())
+        self.update_code_line_numbers()
         self.update_line_number_area_width(0)
         self.highlight_current_line()
 
@@ -116,19 +214,9 @@ class MindustryLogicEditor(BaseCodeEditor):
         :rtype: None
         """
         super(MindustryLogicEditor, self).resizeEvent(event)
-        rect: QRect = self.contentsRect()
-        line_number_area_width: int = self.line_number_area_width()
         # find_and_replace_widget_size: QSize = self.find_and_replace_widget_size()
 
-        # set line number area geometry
-        self.line_number_area.setGeometry(
-            QRect(
-                rect.left(),
-                rect.top(),
-                line_number_area_width,
-                rect.height()
-            )
-        )
+        self.update_line_number_area_geometry()
 
         # # set find dialog geometry
         # self.find_and_replace_widget.setGeometry(
@@ -141,6 +229,88 @@ class MindustryLogicEditor(BaseCodeEditor):
         #     )
         # )
 
+    def update_line_number_area_geometry(self) -> None:
+        """
+        Fit line number area to the editor's height & the line number area width
+
+        :return: None
+        :rtype: None
+        """
+        rect: QRect = self.contentsRect()
+        self.line_number_area.setGeometry(
+            QRect(
+                rect.left(),
+                rect.top(),
+                self.line_number_area_width(),
+                rect.height()
+            )
+        )
+        self.update_gutter_background()
+
+    @pyqtSlot()
+    def _apply_zoom(self) -> None:
+        """
+        Resize editor font by all zoom steps requested since the last resize, then resize the line number area
+        to the new font (setting the viewport margins doesn't resize the editor)
+
+        :return: None
+        :rtype: None
+        """
+        super(MindustryLogicEditor, self)._apply_zoom()
+        self.update_line_number_area_width(0)
+
+    def changeEvent(self, event: QEvent) -> None:
+        """
+        Handle editor state changes, refresh cached font measurements when the font changes
+
+        :param event: change event
+        :type event: QEvent
+        :return: None
+        :rtype: None
+        """
+        if event.type() == QEvent.FontChange:
+            self._font_metrics = self.fontMetrics()
+            self._digit_width = self._font_metrics.horizontalAdvance("9")
+            self._line_height = self._font_metrics.height()
+            self._static_text_cache = collections.OrderedDict()
+            self._line_count = 0
+        super(MindustryLogicEditor, self).changeEvent(event)
+
+    def clear(self) -> None:
+        """
+        Clear editor's text, clearing the text also removes the current line highlight
+
+        :return: None
+        :rtype: None
+        """
+        self._highlighted_block_number = -1
+        super(MindustryLogicEditor, self).clear()
+
+    def load_text(self, file_content: str) -> None:
+        """
+        Replace editor's text with an opened file's content, highlighting is deferred while the text is
+        replaced, then the visible lines are highlighted first and the rest of the file in the background
+
+        :param file_content: file content
+        :type file_content: str
+        :return: None
+        :rtype: None
+        """
+        self.highlighter.defer_highlighting()
+        super(MindustryLogicEditor, self).load_text(file_content)
+        self.highlighter.highlight_deferred_blocks(*self.visible_blocks())
+
+    def visible_blocks(self) -> Tuple[QTextBlock, QTextBlock]:
+        """
+        Get first and last visible blocks
+
+        :return: first and last visible blocks
+        :rtype: Tuple[QTextBlock, QTextBlock]
+        """
+        first_block: QTextBlock = self.firstVisibleBlock()
+        last_block: QTextBlock = self.cursorForPosition(QPoint(0, self.viewport().height() - 1)).block()
+        return first_block, last_block
+
     def keyPressEvent(self, event: QKeyEvent) -> None:
         """
         Handle key press events within editor
@@ -159,8 +329,7 @@ class MindustryLogicEditor(BaseCodeEditor):
         :rtype: None
         """
 
-        event_modifiers = event.modifiers()
-        no_modifiers = event_modifiers == Qt.NoModifier
+        no_modifiers: bool = int(event.modifiers()) == 0
         event_key = event.key()
 
         # The following keys are forwarded by the completer to the widget
@@ -351,9 +520,12 @@ class MindustryLogicEditor(BaseCodeEditor):
         :rtype:
         """
         line_count = max(1, self.blockCount())
-        width_in_digits = max(math.floor(math.log10(line_count)) + 2, 4)
-        width_in_pixels = 3 + self.fontMetrics().horizontalAdvance("9") * width_in_digits
-        return width_in_pixels * 2
+        if line_count != self._line_count:
+            self._line_count = line_count
+            width_in_digits = max(len(str(line_count)) + 1, 4)
+            width_in_pixels = 3 + self._digit_width * width_in_digits
+            self._line_number_area_width = width_in_pixels * 2
+        return self._line_number_area_width
 
     def line_number_area_paint_event(self, event: QPaintEvent) -> None:
         """
@@ -364,45 +536,44 @@ class MindustryLogicEditor(BaseCodeEditor):
         :return: None
         :rtype: None
         """
+        # renumber changed lines before drawing their code line numbers
+        self.update_code_line_numbers()
+
         # color background
         painter: QPainter = QPainter(self.line_number_area)
+        paint_rect: QRect = event.rect()
+        painter.setClipRect(paint_rect)
 
-        code_line_number_area_offset: int = math.floor(self.line_number_area.width() / 2)
+        code_line_number_area_offset: int = self.line_number_area.width() // 2
 
-        # paint line number area background
-        line_number_rect = event.rect()
-        line_number_rect.setX(0)
-        line_number_rect.setWidth(code_line_number_area_offset)
-        painter.fillRect(line_number_rect, QColor(200, 200, 200))  # light gray
+        # paint line number area & code line number area backgrounds
+        if self._gutter_bg_pixmap.size() != self.line_number_area.size():
+            self.update_gutter_background()
+        painter.drawPixmap(paint_rect, self._gutter_bg_pixmap, paint_rect)
 
-        # paint code line number area background
-        code_line_number_rect = event.rect()
-        code_line_number_rect.setX(code_line_number_area_offset)
-        code_line_number_rect.setWidth(code_line_number_area_offset)
-        painter.fillRect(code_line_number_rect, QColor(200, 200, 200).lighter(120))  # light gray
-
-        # write line number and code line number
-        text_block: QTextBlock = self.firstVisibleBlock()
+        # write line number and code line number, starting from the first block in the area to repaint
+        text_block: QTextBlock = self.cursorForPosition(QPoint(0, max(0, paint_rect.top()))).block()
         block_number: int = text_block.blockNumber()
         top: int = round(self.blockBoundingGeometry(text_block).translated(self.contentOffset()).top())
-        bottom: int = top + round(self.blockBoundingRect(text_block).height())
+        block_height: int = round(self.blockBoundingRect(text_block).height())
+        bottom: int = top + block_height
+
+        # all blocks have the same height, unless lines are wrapped
+        is_fixed_height: bool = self.lineWrapMode() == QPlainTextEdit.NoWrap
+
+        # line numbers font
+        font: QFont = self.line_number_area.font()
+        font.setPointSize(self.font.pointSize())
+        painter.setFont(font)
 
-        while text_block.isValid() and top <= event.rect().bottom():
-            if text_block.isVisible() and bottom >= event.rect().top():
+        # collect line numbers and code line numbers, then draw each group with its own pen
+        line_numbers: List[Tuple[int, QStaticText]] = list()
+        code_line_numbers: List[Tuple[int, QStaticText]] = list()
+
+        while text_block.isValid() and top <= paint_rect.bottom():
+            if text_block.isVisible():
                 # line number
-                number: str = str(block_number + 1)
-                font: QFont = self.line_number_area.font()
-                font.setPointSize(self.font.pointSize())
-                painter.setFont(font)
-                painter.setPen(Qt.black)
-                painter.drawText(
-                    0,
-                    top,
-                    self.line_number_area.width(),
-                    self.fontMetrics().height(),
-                    Qt.AlignLeft,
-                    number
-                )
+                line_numbers.append((top, self.get_static_text(block_number + 1, font)))
 
                 # code line number
                 block_data: CodeLineNumber = text_block.userData()
@@ -410,21 +581,83 @@ class MindustryLogicEditor(BaseCodeEditor):
                 if block_data is None:
                     break
 
-                painter.setPen(Qt.darkCyan)
-                painter.drawText(
-                    code_line_number_area_offset,
-                    top,
-                    self.line_number_area.width(),
-                    self.fontMetrics().height(),
-                    Qt.AlignLeft,
-                    str(block_data.number) if (block_data.number >= 0 and block_data.is_code) else ""
-                )
+                # code lines have an odd packed value, and a code line number of at least 0
+                if block_data.packed & 1 and block_data.packed >= 0:
+                    code_line_numbers.append((top, self.get_static_text(block_data.packed >> 1, font)))
 
             text_block = text_block.next()
             top = bottom
-            bottom = top + round(self.blockBoundingRect(text_block).height())
+            bottom = top + (block_height if is_fixed_height else round(self.blockBoundingRect(text_block).height()))
             block_number += 1
 
+        painter.setPen(Qt.black)
+        for top, static_text in line_numbers:
+            painter.drawStaticText(0, top, static_text)
+
+        painter.setPen(Qt.darkCyan)
+        for top, static_text in code_line_numbers:
+            painter.drawStaticText(code_line_number_area_offset, top, static_text)
+
+    def get_static_text(self, number: int, font: QFont) -> QStaticText:
+        """
+        Get a laid out static text for a line number (or code line number)
+
+        :param number: line number
+        :type number: int
+        :param font: font used to draw the text
+        :type font: QFont
+        :return: static text
+        :rtype: QStaticText
+        """
+        static_text: Optional[QStaticText] = self._static_text_cache.get(number)
+        if static_text is None:
+            static_text = QStaticText(str(number))
+            static_text.setTextFormat(Qt.PlainText)
+            static_text.prepare(QTransform(), font)
+            self._static_text_cache[number] = static_text
+            if len(self._static_text_cache) > MindustryLogicEditor.STATIC_TEXT_CACHE_SIZE:
+                self._static_text_cache.popitem(last=False)
+        else:
+            self._static_text_cache.move_to_end(number)
+        return static_text
+
+    def update_gutter_background(self) -> None:
+        """
+        Paint line number area and code line number area backgrounds into a pixmap
+        the size of the line number area
+
+        :return: None
+        :rtype: None
+        """
+        code_line_number_area_offset: int = self.line_number_area.width() // 2
+        self._gutter_bg_pixmap = QPixmap(self.line_number_area.size())
+        if self._gutter_bg_pixmap.isNull():
+            return  # line number area isn't laid out yet, there is nothing to paint on
+
+        self._gutter_bg_pixmap.fill(Qt.transparent)
+
+        painter: QPainter = QPainter(self._gutter_bg_pixmap)
+
+        # line number area background
+        painter.fillRect(
+            0,
+            0,
+            code_line_number_area_offset,
+            self._gutter_bg_pixmap.height(),
+            self._line_number_area_brush
+        )
+
+        # code line number area background
+        painter.fillRect(
+            code_line_number_area_offset,
+            0,
+            code_line_number_area_offset,
+            self._gutter_bg_pixmap.height(),
+            self._code_line_number_area_brush
+        )
+
+        painter.end()
+
     def text_under_cursor(self) -> str:
         """
         Get current text under cursor
@@ -433,8 +666,37 @@ class MindustryLogicEditor(BaseCodeEditor):
         :rtype: string
         """
         text_cursor: QTextCursor = self.textCursor()
-        text_cursor.select(QTextCursor.WordUnderCursor)
-        return text_cursor.selectedText()
+        key: Tuple[int, int] = (text_cursor.position(), self.document().revision())
+        if key != self._text_under_cursor_key:
+            line_text: str = text_cursor.block().text()
+            word_start, word_end = self.word_under_cursor(line_text, text_cursor.positionInBlock())
+            self._text_under_cursor_key = key
+            self._text_under_cursor_text = line_text[word_start:word_end]
+        return self._text_under_cursor_text
+
+    @staticmethod
+    def word_under_cursor(line_text: str, position: int) -> Tuple[int, int]:
+        """
+        Get the start and end of the word around a position in a line, words are made of letters, digits,
+        underscores and '@' (mindustry logic identifiers are ASCII, so no need for Qt's word boundaries)
+
+        :param line_text: line text
+        :type line_text: str
+        :param position: position in line
+        :type position: int
+        :return: word start and end positions in line
+        :rtype: Tuple[int, int]
+        """
+        word_start: int = position
+        while word_start > 0 and (line_text[word_start - 1].isalnum() or line_text[word_start - 1] in "_@"):
+            word_start -= 1
+
+        word_end: int = position
+        line_length: int = len(line_text)
+        while word_end < line_length and (line_text[word_end].isalnum() or line_text[word_end] in "_@"):
+            word_end += 1
+
+        return word_start, word_end
 
     def add_word_to_keyword(self, word: str) -> None:
         """
@@ -447,13 +709,25 @@ class MindustryLogicEditor(BaseCodeEditor):
         """
 
         word = word.strip()
-        if len(word) < 4:
+        if len(word) < 4 or word in self.keywords:
+            return
+        self.keywords.add(word)
+        self.completer.update_model(self.keywords)
+
+    def add_words_to_keywords(self, words: Iterable[str]) -> None:
+        """
+        Add a group of words to word list, updating the completer's model once
+
+        :param words: words (only words of at least 4 characters in length are added)
+        :type words: Iterable[str]
+        :return: None
+        :rtype: None
+        """
+        keywords_count: int = len(self.keywords)
+        self.keywords.update(word for word in map(str.strip, words) if len(word) >= 4)
+        if len(self.keywords) == keywords_count:
             return
-        keywords = set(self.keywords)
-        keywords.add(word)
-        keywords = list(keywords)
-        self.keywords = keywords
-        self.completer.update_model(keywords)
+        self.completer.update_model(self.keywords)
 
     def insertFromMimeData(self, source: QMimeData) -> None:
         """
@@ -467,10 +741,7 @@ class MindustryLogicEditor(BaseCodeEditor):
         super(MindustryLogicEditor, self).insertFromMimeData(source)
 
         if source.hasText():
-            for line in source.text().splitlines():
-                for word in line.split():
-                    if word.isalnum():
-                        self.add_word_to_keyword(word)
+            self.add_words_to_keywords(word for word in source.text().split() if word.isalnum())
 
     def hide_find_and_replace_widget(self) -> None:
         """
@@ -498,10 +769,7 @@ class MindustryLogicEditor(BaseCodeEditor):
 
         if search_flags & SearchFlags.Regex:
 
-            if search_flags & SearchFlags.CaseSensitive:
-                regex_expr: QRegExp = QRegExp(search_expr, Qt.CaseSensitive)
-            else:
-                regex_expr: QRegExp = QRegExp(search_expr)
+            regex_expr: QRegExp = compile_search_regex(search_expr, search_flags & SearchFlags.CaseSensitive)
 
             if search_flags & SearchFlags.WholeWord:
                 search_options |= QTextDocument.FindWholeWords
@@ -539,6 +807,11 @@ class MindustryLogicEditor(BaseCodeEditor):
         text_cursor: QTextCursor = self.textCursor()  # current text cursor
         og_position: int = text_cursor.position()  # current text cursor's position
 
+        # search while typing starts from the current match, so it's kept while it still matches
+        if search_flags & SearchFlags.Incremental:
+            text_cursor.setPosition(text_cursor.selectionStart(), QTextCursor.MoveAnchor)
+            self.setTextCursor(text_cursor)
+
         # find search expr starting from current cursor position
         found: bool = self._find_string(search_expr, search_flags)
         if found:
@@ -571,6 +844,7 @@ class MindustryLogicEditor(BaseCodeEditor):
         text_cursor: QTextCursor = self.textCursor()  # current text cursor
         og_position: int = text_cursor.position()  # text cursor position
         extra_selections: List[QTextEdit.ExtraSelection] = self.extraSelections()
+        selection_color: QColor = QColor(160, 255, 160).lighter(110)  # light green
 
         # go to the start of the document
         text_cursor.movePosition(QTextCursor.Start, QTextCursor.MoveAnchor)
@@ -578,12 +852,24 @@ class MindustryLogicEditor(BaseCodeEditor):
 
         # find all occurrences of search_exp
         result_count: int = 0
-        while self._find_string(search_expr, search_flags):
-            result_count += 1
-            selection: QTextEdit.ExtraSelection = QTextEdit.ExtraSelection()
-            selection.format.setBackground(QColor(160, 255, 160).lighter(110))  # light green
-            selection.cursor = self.textCursor()
-            extra_selections.append(selection)
+        occurrences: Optional[List[int]] = self._find_all_literal(search_expr, search_flags)
+        if occurrences is not None:
+            for position in occurrences:
+                result_count += 1
+                selection: QTextEdit.ExtraSelection = QTextEdit.ExtraSelection()
+                selection.format.setBackground(selection_color)
+                selection.cursor = QTextCursor(self.document())
+                selection.cursor.setPosition(position)
+                selection.cursor.setPosition(position + len(search_expr), QTextCursor.KeepAnchor)
+                extra_selections.append(selection)
+
+        else:
+            while self._find_string(search_expr, search_flags):
+                result_count += 1
+                selection: QTextEdit.ExtraSelection = QTextEdit.ExtraSelection()
+                selection.format.setBackground(selection_color)
+                selection.cursor = self.textCursor()
+                extra_selections.append(selection)
 
         # return text cursor to its original position
         text_cursor.setPosition(og_position, QTextCursor.MoveAnchor)
@@ -593,6 +879,58 @@ class MindustryLogicEditor(BaseCodeEditor):
         self.setExtraSelections(extra_selections)
         return result_count
 
+    def _find_all_literal(self, search_expr: str, search_flags: SearchFlags) -> Optional[List[int]]:
+        """
+        A helper function to find all occurrences of a search expression that is plain text, by searching
+        the editor's text directly instead of moving the text cursor to each occurrence
+
+        Only ASCII text is searched, so string indices are document positions and case folding matches Qt's
+
+        :param search_expr: search expression
+        :type search_expr: str
+        :param search_flags: search flags
+        :type search_flags: SearchFlags
+        :return: positions of all occurrences, or None if search expression can't be searched as plain text
+        :rtype: Optional[List[int]]
+        """
+        if not search_expr or not search_expr.isascii():
+            return None
+
+        # regular expressions are always case sensitive
+        if search_flags & SearchFlags.Regex:
+            if not is_literal_expression(search_expr):
+                return None
+            case_sensitive: bool = True
+        else:
+            case_sensitive: bool = bool(search_flags & SearchFlags.CaseSensitive)
+
+        self._ensure_text_cache()
+        text: str = self._plain_text_cache
+        # line separators, non-breaking spaces & other non ASCII text are searched by the document
+        if not text.isascii():
+            return None
+
+        if not case_sensitive:
+            text = text.lower()
+            search_expr = search_expr.lower()
+
+        whole_word: bool = bool(search_flags & SearchFlags.WholeWord)
+        expr_length: int = len(search_expr)
+        text_length: int = len(text)
+        occurrences: List[int] = list()
+        position: int = text.find(search_expr)
+        while position >= 0:
+            end: int = position + expr_length
+            if whole_word and ((position > 0 and text[position - 1].isalnum()) or
+                               (end < text_length and text[end].isalnum())):
+                position = text.find(search_expr, position + 1)
+                continue
+
+            occurrences.append(position)
+            position = text.find(search_expr, end)
+
+        return occurrences
+
     def replace_string(self, search_expr: str, replace_expr: str, search_flags: SearchFlags) -> int:
         """
         Replace search expression with replace expression
@@ -653,9 +991,17 @@ class MindustryLogicEditor(BaseCodeEditor):
         if self.isReadOnly():
             return
 
+        # cursor moved within the highlighted line, edits can move the highlight to another line though
+        block_number: int = self.textCursor().blockNumber()
+        if block_number == self._highlighted_block_number:
+            for selection in self.extraSelections():
+                if selection.format.boolProperty(QTextFormat.FullWidthSelection) \
+                        and selection.cursor.blockNumber() == block_number:
+                    return
+        self._highlighted_block_number = block_number
+
         selection: QTextEdit.ExtraSelection = QTextEdit.ExtraSelection()
-        line_color = QColor(255, 215, 0).lighter(180)  # light gold
-        selection.format.setBackground(line_color)
+        selection.format.setBackground(self._current_line_color)
         selection.format.setProperty(QTextFormat.FullWidthSelection, True)
         selection.cursor = self.textCursor()
         selection.cursor.clearSelection()
@@ -676,38 +1022,94 @@ class MindustryLogicEditor(BaseCodeEditor):
         # update text editor's view port right margin
         left_margin = self.line_number_area_width()
         viewport_margins: QMargins = self.viewportMargins()
+
+        # setting viewport margins lays out the editor again, even if they didn't change
+        if viewport_margins.left() == left_margin:
+            return
+
         viewport_margins.setLeft(left_margin)
         self.setViewportMargins(viewport_margins)
+        self.update_line_number_area_geometry()
 
-        # get first visible text block
-        text_block: QTextBlock = self.firstVisibleBlock()
-        block_bottom: int = self.blockBoundingGeometry(text_block).translated(self.contentOffset()).bottom()
+    @pyqtSlot(int, int, int)
+    def mark_code_line_numbers_dirty(self, position: int, chars_removed: int, chars_added: int) -> None:
+        """
+        Add the lines where the document's contents changed to the lines to renumber, all changes
+        within one event loop pass (e.g. commenting a block of lines) are renumbered at once
+
+        :param position: position of the change
+        :type position: int
+        :param chars_removed: number of removed characters
+        :type chars_removed: int
+        :param chars_added: number of added characters
+        :type chars_added: int
+        :return: None
+        :rtype: None
+        """
+        document: QTextDocument = self.document()
+        last_position: int = document.characterCount() - 1
+        change_start: int = min(position, last_position)
+        change_end: int = min(position + chars_added, last_position)
+
+        if self._dirty_start_cursor is None:
+            self._dirty_start_cursor = QTextCursor(document)
+            self._dirty_start_cursor.setPosition(change_start)
+            self._dirty_end_cursor = QTextCursor(document)
+            self._dirty_end_cursor.setPosition(change_end)
+        else:
+            if change_start < self._dirty_start_cursor.position():
+                self._dirty_start_cursor.setPosition(change_start)
+            if change_end > self._dirty_end_cursor.position():
+                self._dirty_end_cursor.setPosition(change_end)
 
-        # iterate over text blocks
-        while text_block.isValid() and block_bottom <= self.geometry().bottom():
+        self._code_line_numbers_timer.start(0)
 
-            prev_block: QTextBlock = text_block.previous()  # prev block
-            prev_block_data: CodeLineNumber = prev_block.userData()  # prev block data
+    @pyqtSlot()
+    def update_code_line_numbers(self) -> None:
+        """
+        Update code line numbers of the changed lines. Blocks after the changed ones are renumbered
+        until their code line numbers no longer change
+
+        :return: None
+        :rtype: None
+        """
+        if self._dirty_start_cursor is None:
+            return
+
+        text_block: QTextBlock = self._dirty_start_cursor.block()
+        last_changed_block_number: int = self._dirty_end_cursor.block().blockNumber()
+        self._dirty_start_cursor = None
+        self._dirty_end_cursor = None
 
-            current_block_text: str = text_block.text().strip()  # current block text
-            is_code: bool = len(current_block_text) > 0 and not current_block_text.startswith("#")
-            current_block_data = CodeLineNumber(is_code=is_code)  # current block data
+        # code line number of the previous block
+        prev_block_data: Optional[CodeLineNumber] = text_block.previous().userData()
+        number: int = prev_block_data.number if prev_block_data is not None else -1
 
+        # renumber blocks
+        renumbered_unchanged_blocks: bool = False
+        while text_block.isValid():
+
+            is_code: bool = self.is_code_line(text_block.text())
             if is_code:
-                if prev_block.isValid():
-                    current_block_data.number = prev_block_data.number + 1
-                else:
-                    current_block_data.number = 0
+                number += 1
+
+            block_data: Optional[CodeLineNumber] = text_block.userData()
+            is_after_change: bool = text_block.blockNumber() > last_changed_block_number
+            packed: int = CodeLineNumber.pack(number, is_code)
 
+            if block_data is not None and block_data.packed == packed:
+                if is_after_change:
+                    break
             else:
-                if prev_block.isValid():
-                    current_block_data.number = prev_block_data.number
-                else:
-                    current_block_data.number = -1
+                text_block.setUserData(CodeLineNumber(packed))
+                renumbered_unchanged_blocks = renumbered_unchanged_blocks or is_after_change
 
-            text_block.setUserData(current_block_data)
             text_block = text_block.next()
 
+        # code line numbers below the changed lines are not repainted with them
+        if renumbered_unchanged_blocks:
+            self.line_number_area.update()
+
     @pyqtSlot(QRect, int)
     def update_line_number_area(self, rect: QRect, dy: int) -> None:
         """
@@ -733,6 +1135,10 @@ class MindustryLogicEditor(BaseCodeEditor):
         if rect.contains(self.viewport().rect()):
             self.update_line_number_area_width(0)
 
+        # lines scrolled into view before the background highlighting reached them
+        if self.highlighter.has_deferred_blocks():
+            self.highlighter.highlight_visible_blocks(*self.visible_blocks())
+
     @pyqtSlot(str)
     def insert_completion(self, completion: str) -> None:
         """
@@ -750,10 +1156,30 @@ class MindustryLogicEditor(BaseCodeEditor):
             return
 
         text_cursor: QTextCursor = self.textCursor()
-        text_cursor.select(QTextCursor.WordUnderCursor)
+        block_position: int = text_cursor.block().position()
+        word_start, word_end = self.word_under_cursor(text_cursor.block().text(), text_cursor.positionInBlock())
+        text_cursor.setPosition(block_position + word_start)
+        text_cursor.setPosition(block_position + word_end, QTextCursor.KeepAnchor)
         text_cursor.insertText(completion)
         self.setTextCursor(text_cursor)
 
+    @staticmethod
+    def is_code_line(line_text: str) -> bool:
+        """
+        Check if a line is a code line, code lines have a first non whitespace character that's
+        not a comment (#). The line is scanned in place, without stripping a copy of it
+
+        :param line_text: line text
+        :type line_text: str
+        :return: True if the line is a code line, False if it's empty or a comment
+        :rtype: bool
+        """
+        text_length: int = len(line_text)
+        index: int = 0
+        while index < text_length and line_text[index].isspace():
+            index += 1
+        return index < text_length and line_text[index] != "#"
+
     @staticmethod
     def comment_line(text_cursor: QTextCursor) -> None:
         """
@@ -764,9 +1190,10 @@ class MindustryLogicEditor(BaseCodeEditor):
         :return:
         :rtype:
         """
-        line_text: str = text_cursor.block().text()
+        document: QTextDocument = text_cursor.document()
+        line_start: int = text_cursor.block().position()
         text_cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.MoveAnchor)
-        if line_text.startswith(" "):
+        if document.characterAt(line_start) == " ":
             text_cursor.insertText("#")
         else:
             text_cursor.insertText("# ")
@@ -781,9 +1208,10 @@ class MindustryLogicEditor(BaseCodeEditor):
         :return: None
         :rtype: None
         """
-        line_text: str = text_cursor.block().text()
+        document: QTextDocument = text_cursor.document()
+        line_start: int = text_cursor.block().position()
         text_cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.MoveAnchor)
-        if line_text.startswith("# "):
+        if document.characterAt(line_start) == "#" and document.characterAt(line_start + 1) == " ":
             offset: int = 2
         else:
             offset: int = 1
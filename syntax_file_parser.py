@@ -4,23 +4,34 @@
 
 import pathlib
 import json
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 
 class SyntaxFileParser(object):
 
+    # parsed syntax files by path, along with their modification time when they were parsed
+    _syntax_cache: Dict[str, Tuple[float, Dict[str, List[str]]]] = dict()
+
     def __init__(self, file_path: str):
         self.file_path: pathlib.Path = pathlib.Path(file_path)
         self.syntax = self.parse_syntax_file(self.file_path)
 
-    @staticmethod
-    def parse_syntax_file(file_path: pathlib.Path) -> Dict[str, List[str]]:
+    @classmethod
+    def parse_syntax_file(cls, file_path: pathlib.Path) -> Dict[str, List[str]]:
         """
-        Parse syntax file and get builtin_functions, params, special_variables
+        Parse syntax file and get builtin_functions, params, special_variables, a file is parsed again
+        only when it changes
 
         :return: dictionary containing syntax
         :rtype: Dict[str, List[str]]
         """
+        file_path = pathlib.Path(file_path)
+        resolved_path: str = str(file_path.resolve())
+        modification_time: float = file_path.stat().st_mtime
+        cached_mtime, cached_syntax = cls._syntax_cache.get(resolved_path, (None, None))
+        if cached_mtime == modification_time:
+            return cached_syntax
+
         syntax = {
             "builtin_functions": [],
             "params":            [],
@@ -40,6 +51,7 @@ class SyntaxFileParser(object):
                     for param_name in param.values():
                         syntax["params"].extend(param_name)
 
+        cls._syntax_cache[resolved_path] = (modification_time, syntax)
         return syntax
 
     def get_keywords(self) -> List[str]: